@@ -0,0 +1,86 @@
+"""
+Lines per second of classify_line against the sequential regex probes it replaced
+
+Usage: python benchmarks/bench_classify.py [--lines N] [--runs N] [PATH ...]
+
+Classifies every line of the given mamba files, or of a synthetic spec of N lines, and checks both classifiers agree.
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from mamba_to_pytest.line_table import LineKind  # noqa: E402
+from mamba_to_pytest.steps.split_mamba import classify_line, iter_line_spans, parse_a_with_line  # noqa: E402
+
+from synthetic_spec import count_contexts, create_spec  # noqa: E402
+
+
+# The patterns as they were before LINE_KIND_PATTERN
+_LINE_PATTERN = re.compile(r'( *)([^ ].*)?$')
+_BLANK_LINE_PATTERN = re.compile(r'\s*\Z')
+_MAMBA_IMPORT_PATTERN = re.compile(r'''(from|import) mamba(\s|$)''')
+_WITH_START_PATTERN = re.compile(r'''with\s+(description|context|describe|it|(?:before|after)[._](?:each|all))\s*''')
+_CLASS_PATTERN = re.compile(r'''class\s''')
+_METHOD_START_PATTERN = re.compile(r'''def\s+(\w+)\s*\(\s*self(?:\W|$)''')
+
+
+def _classify_line_sequentially(source, start, end):
+    if _BLANK_LINE_PATTERN.match(source, start, end):
+        return LineKind.CODELESS, 0, None
+    elif source.startswith('def test_', start, end):
+        raise Exception('Function needs to be renamed')
+
+    match = _LINE_PATTERN.match(source, start, end)
+    tail = match.start(2)
+    assert not source.startswith('\t', tail, end)
+    indent = tail - start
+    if _MAMBA_IMPORT_PATTERN.match(source, tail, end):
+        return None
+    elif source.startswith('#', tail, end):
+        return LineKind.CODELESS, 0, None
+    elif _WITH_START_PATTERN.match(source, tail, end):
+        return LineKind.WITH, indent, parse_a_with_line(source, start, tail, end)
+    elif _CLASS_PATTERN.match(source, tail, end):
+        return LineKind.CLASS, indent, None
+    elif match := _METHOD_START_PATTERN.match(source, tail, end):
+        return LineKind.METHOD, indent, match.group(1)
+    else:
+        return LineKind.CODE, indent, None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('paths', nargs='*', type=Path)
+    parser.add_argument('--lines', type=int, default=200_000)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.paths:
+        sources = [path.read_text() for path in args.paths]
+    else:
+        sources = [create_spec(count_contexts(args.lines), import_mamba=False)]
+    spans = [span for source in sources for span in iter_line_spans(source)]
+    print(f'{len(spans)} lines')
+
+    for source, start, end in spans:
+        assert classify_line(source, start, end) == _classify_line_sequentially(source, start, end), source[start:end]
+
+    for name, classify in (('sequential probes', _classify_line_sequentially), ('classify_line', classify_line)):
+        best = min(_time(classify, spans) for _ in range(args.runs))
+        print(f'{name:<20} {len(spans) / best / 1000:>8.0f}k lines/s')
+
+
+def _time(classify, spans) -> float:
+    start = time.perf_counter()
+    for span in spans:
+        classify(*span)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Time of group_plain_lines_into_blocks against the size of a block
+
+Usage: python benchmarks/bench_group_blocks.py [--runs N] [SIZE ...]
+
+For each size (default: 10000 and 100000), groups a single block of that many blank lines followed by as many lines
+of code, so of twice as many lines, in microseconds per line. Grouping is linear if the time per line stays about the same.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from mamba_to_pytest.lines import CodelessLine, LineOfCode  # noqa: E402
+from mamba_to_pytest.steps.group_plain_lines_into_blocks import group_plain_lines_into_blocks  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('sizes', nargs='*', type=int, default=[10_000, 100_000])
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        # The body indent used to be searched past the blank lines for each line
+        lines = [CodelessLine('\n')] * size + [LineOfCode(indent=4, line='    x\n')] * size
+        seconds = min(_time(lines) for _ in range(args.runs))
+        print(f'{len(lines):>8} lines: {seconds * 1e6 / len(lines):>6.3f} µs per line')
+
+
+def _time(lines: list) -> float:
+    start = time.perf_counter()
+    (block,) = group_plain_lines_into_blocks(lines)
+    assert block.indent == 4
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Import time of the CLI, checked against a budget
+
+Usage: python benchmarks/bench_import_time.py [--runs N]
+
+Exits with status 1 if the median import time of mamba_to_pytest.main exceeds the budget or if any of the modules
+which should only be imported on first use are imported eagerly.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BUDGET_MS = 60.0
+"""Median cumulative import time of mamba_to_pytest.main as reported by python -X importtime"""
+
+DEFERRED_MODULES = (
+    'inflection',
+    'more_itertools',
+    'dataclasses',
+    'concurrent.futures',
+    'cProfile',
+    'mamba_to_pytest.api',
+    'mamba_to_pytest.cache',
+    'mamba_to_pytest.pipeline',
+    'mamba_to_pytest.nodes',
+    'mamba_to_pytest.server',
+)
+
+_SRC = Path(__file__).resolve().parent.parent / 'src'
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    env = {**os.environ, 'PYTHONPATH': str(_SRC)}
+    import_times = [_measure_import_ms(env) for _ in range(args.runs)]
+    median = statistics.median(import_times)
+    print(f'import mamba_to_pytest.main: median {median:.1f} ms, min {min(import_times):.1f} ms, budget {BUDGET_MS} ms')
+
+    eager_modules = _get_eager_modules(env)
+    if eager_modules:
+        print(f'Imported eagerly, should be imported on first use: {", ".join(eager_modules)}')
+
+    if median > BUDGET_MS or eager_modules:
+        sys.exit(1)
+
+
+def _measure_import_ms(env: dict[str, str]) -> float:
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import mamba_to_pytest.main'],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    for line in result.stderr.splitlines():
+        _, cumulative_us, name = line.removeprefix('import time:').split('|')
+        if name.strip() == 'mamba_to_pytest.main':
+            return int(cumulative_us) / 1000
+    raise Exception(f'mamba_to_pytest.main not in importtime output:\n{result.stderr}')
+
+
+def _get_eager_modules(env: dict[str, str]) -> list[str]:
+    result = subprocess.run(
+        [sys.executable, '-c', 'import sys, mamba_to_pytest.main; print("\\n".join(sys.modules))'],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    imported = set(result.stdout.splitlines())
+    return [module for module in DEFERRED_MODULES if module in imported]
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Memory per line of the line-level stages: line objects against a LineTable
+
+Usage: python benchmarks/bench_line_memory.py [--lines N]
+
+Measures with tracemalloc, on a synthetic spec, the memory retained by the classified lines and the peak while running
+the line-level stages up to the list of blocks, in bytes per input line. The source text itself is excluded from both.
+Note that the staged stages are lazy generators which never hold all lines at once, so their peak is mostly the blocks,
+while the table is held in full until the blocks are done.
+"""
+
+import argparse
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from mamba_to_pytest.steps.group_plain_lines_into_blocks import group_plain_lines_into_blocks, \
+    group_table_into_blocks  # noqa: E402
+from mamba_to_pytest.steps.ignore_class_and_def_bodies import ignore_class_and_def_bodies, \
+    ignore_class_and_def_bodies_in_table  # noqa: E402
+from mamba_to_pytest.steps.split_mamba import split_mamba, split_mamba_into_table  # noqa: E402
+from mamba_to_pytest.steps.split_off_comments import split_off_comments, split_off_comments_in_table  # noqa: E402
+
+from synthetic_spec import count_contexts, create_spec  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--lines', type=int, default=100_000)
+    args = parser.parse_args()
+
+    source = create_spec(count_contexts(args.lines))
+    line_count = source.count('\n')
+    print(f'{line_count} lines')
+
+    retained, peak = _measure(lambda: list(split_mamba(source)))
+    _print('split_mamba (objects)', retained, peak, line_count)
+    retained, peak = _measure(lambda: split_mamba_into_table(source))
+    _print('split_mamba_into_table', retained, peak, line_count)
+
+    _, peak = _measure(lambda: list(group_plain_lines_into_blocks(
+        split_off_comments(ignore_class_and_def_bodies(split_mamba(source)))
+    )))
+    _print('line stages (objects)', None, peak, line_count)
+    _, peak = _measure(lambda: list(group_table_into_blocks(
+        split_off_comments_in_table(ignore_class_and_def_bodies_in_table(split_mamba_into_table(source)))
+    )))
+    _print('line stages (table)', None, peak, line_count)
+
+
+def _measure(run) -> tuple[int, int]:
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = run()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return current - before, peak - before
+
+
+def _print(name: str, retained: int | None, peak: int, line_count: int) -> None:
+    retained_text = '' if retained is None else f'retained {retained / line_count:>6.1f} B/line, '
+    print(f'{name:<24} {retained_text}peak {peak / line_count:>6.1f} B/line')
+
+
+if __name__ == '__main__':
+    main()
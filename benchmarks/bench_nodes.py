@@ -0,0 +1,72 @@
+"""
+Memory per node of the tree of a large synthetic spec, and time of the visitors on it
+
+Usage: python benchmarks/bench_nodes.py [--contexts N] [--runs N]
+
+Measures with tracemalloc the memory retained by group_lines_into_tree, so excluding the blocks of code it takes as
+input, in bytes per node. Then times the visitors of the pipeline from
+flatten_singleton_test_contexts to convert_self_vars on it, in microseconds per node.
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from mamba_to_pytest.node_visitors.add_methods_to_fixtures import add_methods_to_fixtures  # noqa: E402
+from mamba_to_pytest.node_visitors.combine_setup_teardown import combine_setup_teardown  # noqa: E402
+from mamba_to_pytest.node_visitors.convert_self_methods import convert_self_methods  # noqa: E402
+from mamba_to_pytest.node_visitors.convert_self_vars import convert_self_vars  # noqa: E402
+from mamba_to_pytest.node_visitors.flatten_singleton_test_contexts import flatten_singleton_test_contexts  # noqa: E402
+from mamba_to_pytest.node_visitors.validate import validate_node  # noqa: E402
+from mamba_to_pytest.profiling import count_nodes  # noqa: E402
+from mamba_to_pytest.steps.group_lines_into_tree import group_lines_into_tree  # noqa: E402
+from mamba_to_pytest.steps.group_plain_lines_into_blocks import group_plain_lines_into_blocks  # noqa: E402
+from mamba_to_pytest.steps.ignore_class_and_def_bodies import ignore_class_and_def_bodies  # noqa: E402
+from mamba_to_pytest.steps.split_mamba import split_mamba  # noqa: E402
+from mamba_to_pytest.steps.split_off_comments import split_off_comments  # noqa: E402
+
+from synthetic_spec import create_spec  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--contexts', type=int, default=5000)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    source = create_spec(args.contexts)
+    blocks_and_lines = list(group_plain_lines_into_blocks(
+        split_off_comments(ignore_class_and_def_bodies(split_mamba(source)))
+    ))
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    root = group_lines_into_tree(blocks_and_lines)
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    node_count = count_nodes(root)
+    print(f'{node_count} nodes')
+    print(f'tree:     {retained / node_count:>7.1f} B/node')
+
+    seconds = min(_time_visitors(root) for _ in range(args.runs))
+    print(f'visitors: {seconds * 1e6 / node_count:>7.2f} µs/node')
+
+
+def _time_visitors(root) -> float:
+    start = time.perf_counter()
+    root = flatten_singleton_test_contexts(root)
+    root = combine_setup_teardown(root)
+    root = add_methods_to_fixtures(root)
+    validate_node(root)
+    root = convert_self_methods(root)
+    convert_self_vars(root)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Throughput of each --scanner, of the line-level stages alone and of the whole conversion
+
+Usage: python benchmarks/bench_scanners.py [--lines N] [--runs N] [PATH ...]
+
+Converts the given mamba files, or a synthetic spec of N lines, with each scanner and prints the best of the runs in
+lines per second.
+"""
+
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from mamba_to_pytest.constants import SCANNERS  # noqa: E402
+from mamba_to_pytest.pipeline import convert_mamba, scan_mamba  # noqa: E402
+
+from synthetic_spec import count_contexts, create_spec  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('paths', nargs='*', type=Path)
+    parser.add_argument('--lines', type=int, default=100_000)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.paths:
+        sources = [path.read_text() for path in args.paths]
+    else:
+        sources = [create_spec(count_contexts(args.lines), import_mamba=False)]
+    line_count = sum(source.count('\n') for source in sources)
+    print(f'{line_count} lines')
+
+    print(f'{"scanner":<10} {"line stages":>18} {"conversion":>14}')
+    for scanner in SCANNERS:
+        scan_seconds = min(_time(lambda: _scan_all(sources, scanner)) for _ in range(args.runs))
+        convert_seconds = min(_time(lambda: _convert_all(sources, scanner)) for _ in range(args.runs))
+        print(
+            f'{scanner:<10} {line_count / scan_seconds / 1000:>9.0f}k lines/s'
+            f' {line_count / convert_seconds / 1000:>5.0f}k lines/s'
+        )
+
+
+def _scan_all(sources: list[str], scanner: str) -> None:
+    for source in sources:
+        for _ in scan_mamba(source, scanner):
+            pass
+
+
+def _convert_all(sources: list[str], scanner: str) -> None:
+    for source in sources:
+        convert_mamba(source, io.StringIO(), scanner=scanner)
+
+
+def _time(run) -> float:
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    main()
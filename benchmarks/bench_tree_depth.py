@@ -0,0 +1,54 @@
+"""
+Time of group_lines_into_tree against the nesting depth of a spec
+
+Usage: python benchmarks/bench_tree_depth.py [--tests N] [--runs N] [DEPTH ...]
+
+For each depth (default: 10, 100 and 500), nests that many contexts with N tests in the innermost one and times
+building the tree of its blocks and lines, in microseconds per block or line.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from mamba_to_pytest.steps.group_lines_into_tree import group_lines_into_tree  # noqa: E402
+from mamba_to_pytest.steps.group_plain_lines_into_blocks import group_plain_lines_into_blocks  # noqa: E402
+from mamba_to_pytest.steps.split_mamba import split_mamba  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('depths', nargs='*', type=int, default=[10, 100, 500])
+    parser.add_argument('--tests', type=int, default=10_000)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    for depth in args.depths:
+        blocks_and_lines = list(group_plain_lines_into_blocks(split_mamba(_create_spec(depth, args.tests))))
+        try:
+            seconds = min(_time(blocks_and_lines) for _ in range(args.runs))
+        except RecursionError:
+            print(f'depth {depth:>4}: RecursionError')
+            continue
+        print(f'depth {depth:>4}: {seconds * 1e6 / len(blocks_and_lines):>6.2f} µs per block or line')
+
+
+def _create_spec(depth: int, tests: int) -> str:
+    lines = [f"{'    ' * level}with context('level {level}'):\n" for level in range(depth)]
+    indent = '    ' * depth
+    for i in range(tests):
+        lines.append(f"{indent}with it('works {i}'):\n{indent}    assert {i}\n")
+    return ''.join(lines)
+
+
+def _time(blocks_and_lines: list) -> float:
+    start = time.perf_counter()
+    group_lines_into_tree(blocks_and_lines)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    main()
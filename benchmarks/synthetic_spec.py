@@ -0,0 +1,32 @@
+"""
+Synthetic spec shared by the benchmarks, made of numbered copies of one top-level context
+
+Each context has a fixture, a helper method, a nested context, a test, a trailing comment and a full-line comment.
+"""
+
+CONTEXT = '''\
+with description('context {i}') as self:  # about {i}
+    with before.each:
+        self.value = {i}
+
+    def helper(self, x):
+        return x + self.value
+
+    with context('nested'):
+        with it('works'):
+            # check it
+            assert self.helper(1) == {i} + 1
+            assert self.value
+
+'''
+
+_MAMBA_IMPORT = 'from mamba import description, context, it, before\n\n'
+
+
+def create_spec(contexts: int, import_mamba: bool = True) -> str:
+    return (_MAMBA_IMPORT if import_mamba else '') + ''.join(CONTEXT.format(i=i) for i in range(contexts))
+
+
+def count_contexts(lines: int) -> int:
+    """Number of contexts for a spec of at least `lines` lines"""
+    return lines // CONTEXT.count('\n') + 1
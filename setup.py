@@ -12,7 +12,11 @@ setup(
     author='tim@diels.me',
     package_dir={'': 'src'},
     packages=packages,
+    python_requires='>=3.10',
     entry_points={
-        'console_scripts': ['mamba_to_pytest=mamba_to_pytest.main:main'],
+        'console_scripts': [
+            'mamba_to_pytest=mamba_to_pytest.main:main',
+            'mamba_to_pytest_client=mamba_to_pytest.client:main',
+        ],
     },
 )
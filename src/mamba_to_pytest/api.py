@@ -0,0 +1,130 @@
+"""
+In-memory conversion, without touching the filesystem or printing anything
+"""
+
+from __future__ import annotations
+
+import collections
+import dataclasses
+import io
+import traceback
+import typing as t
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from functools import partial
+
+from mamba_to_pytest.pipeline import convert_mamba
+from mamba_to_pytest.profiling import StageStats
+
+
+_PENDING_PER_JOB = 4
+"""Number of sources to queue per worker process in convert_many, bounds memory use on endless inputs"""
+
+
+class ConversionError(Exception):
+    """
+    A mamba source could not be converted, the original exception is its __cause__
+    """
+
+    def __init__(self, message: str, exception_type: str):
+        super().__init__(message, exception_type)
+        self.message = message
+        self.exception_type = exception_type
+
+    def __str__(self):
+        return self.message
+
+
+@dataclasses.dataclass(frozen=True)
+class ConversionResult:
+    name: str
+
+    output: str | None
+    """The pytest source, None if conversion failed"""
+
+    error: ConversionError | None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+def convert_mamba_source(
+        mamba_source: str | bytes, on_stage: t.Callable[[StageStats], None] | None = None, scanner: str = 'staged'
+) -> str:
+    """
+    Convert mamba source code to pytest source code
+
+    :param mamba_source: text, or bytes which are decoded like Python decodes source, honouring a coding cookie or BOM
+
+    :param on_stage: if given, profile each stage of the conversion and pass its stats to this callback
+    :param scanner: implementation of the line-level stages, see pipeline.convert_mamba
+    :raises ConversionError: if the source cannot be converted automatically
+    """
+    pytest_output = io.StringIO()
+    try:
+        convert_mamba(mamba_source, pytest_output, on_stage, scanner=scanner)
+    except Exception as exc:
+        raise ConversionError(get_error_message(exc), exception_type=type(exc).__name__) from exc
+    return pytest_output.getvalue()
+
+
+def convert_many(
+        sources: t.Iterable[tuple[str, str | bytes]], jobs: int = 1, ordered: bool = False, scanner: str = 'staged'
+) -> t.Iterator[ConversionResult]:
+    """
+    Convert (name, mamba source) pairs, yielding results as they complete. Sources are text or bytes, see
+    convert_mamba_source.
+
+    With a single job, results come in input order and are converted in this process, reusing its already imported
+    modules and compiled patterns across inputs. With more jobs, sources are spread across a pool of processes which
+    stays alive until all sources are converted.
+
+    :param ordered: yield results in input order, even with multiple jobs
+    :param scanner: see convert_mamba_source
+    """
+    convert = partial(_convert_named_source, scanner=scanner)
+    if jobs == 1:
+        yield from map(convert, sources)
+        return
+
+    max_pending = jobs * _PENDING_PER_JOB
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        if ordered:
+            queue: collections.deque[Future[ConversionResult]] = collections.deque()
+            for source in sources:
+                if len(queue) >= max_pending:
+                    yield queue.popleft().result()
+                queue.append(executor.submit(convert, source))
+            while queue:
+                yield queue.popleft().result()
+        else:
+            pending: set[Future[ConversionResult]] = set()
+            for source in sources:
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from (future.result() for future in done)
+                pending.add(executor.submit(convert, source))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from (future.result() for future in done)
+
+
+def _convert_named_source(named_source: tuple[str, str | bytes], scanner: str) -> ConversionResult:
+    name, mamba_source = named_source
+    try:
+        output = convert_mamba_source(mamba_source, scanner=scanner)
+    except ConversionError as exc:
+        # Drop the traceback, it does not survive being sent back from a worker process anyway
+        exc.__cause__ = None
+        return ConversionResult(name=name, output=None, error=exc)
+    return ConversionResult(name=name, output=output, error=None)
+
+
+def get_error_message(exc: Exception) -> str:
+    """
+    The exception's message, or if it has none, e.g. a failed bare assert, the line of code it was raised from
+    """
+    if exc.args:
+        return str(exc)
+    error = ''.join(traceback.format_exception(exc))
+    return error.splitlines()[-2]
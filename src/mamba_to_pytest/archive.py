@@ -0,0 +1,185 @@
+"""
+Conversion of mamba files inside tar and zip archives, without extracting them to disk
+"""
+
+from __future__ import annotations
+
+import collections
+import gzip
+import io
+import tarfile
+import textwrap
+import time
+import typing as t
+import zipfile
+from pathlib import Path, PurePosixPath
+
+from mamba_to_pytest.api import convert_many
+from mamba_to_pytest.discover import is_mamba_file_name, is_excluded_path
+from mamba_to_pytest.main import get_base_name
+
+
+_TAR_WRITE_MODES = {
+    '.tar': 'w',
+    '.tar.gz': 'w:gz',
+    '.tgz': 'w:gz',
+    '.tar.bz2': 'w:bz2',
+    '.tar.xz': 'w:xz',
+}
+
+ARCHIVE_SUFFIXES = ('.zip', *_TAR_WRITE_MODES)
+
+_ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+def convert_archives(
+        archives: t.Iterable[Path],
+        out_archive: Path,
+        exclude: t.Collection[str] = (),
+        jobs: int = 1,
+        quiet: bool = False,
+        scanner: str = 'staged',
+) -> None:
+    """
+    Convert the mamba files in tar or zip archives and write the pytest files into a new archive
+
+    Members are streamed from the input archives and converted in memory, so this works on snapshots of huge trees
+    without writing any of their files. Each pytest file keeps the directory of its mamba file within the archive.
+    The type of the new archive is taken from its suffix: .zip, .tar, .tar.gz, .tgz, .tar.bz2 or .tar.xz. Each pytest
+    file gets the modification time of its mamba file, so converting the same archives again gives the same archive.
+
+    :param exclude: globs matched against the name and the path of each member
+    :param scanner: implementation of the line-level stages, see pipeline.convert_mamba
+    """
+    total = 0
+    succeeded = 0
+    # Results come in input order, so the member each one belongs to can simply be queued up alongside
+    members: collections.deque[tuple[str, float]] = collections.deque()
+    with _ArchiveWriter(out_archive) as writer:
+        sources = _iter_archives_sources(archives, exclude, members)
+        for result in convert_many(sources, jobs=jobs, ordered=True, scanner=scanner):
+            total += 1
+            member_name, mtime = members.popleft()
+            out_name = _get_pytest_member_name(member_name)
+            if result.succeeded and out_name in writer:
+                error = f'Output file already exists: {out_name}'
+            elif result.succeeded:
+                assert result.output is not None
+                writer.add(out_name, result.output, mtime)
+                error = None
+            else:
+                error = str(result.error)
+
+            if error is None:
+                succeeded += 1
+                if not quiet:
+                    print(f'Convert {result.name}\n     to {out_archive}:{out_name}')
+            else:
+                print(f'Convert {result.name}\n{result.name} failed')
+                print(textwrap.indent(error, '    '))
+    print(f'{succeeded}/{total} succeeded')
+    print(f'Wrote {succeeded} files to {out_archive}')
+
+
+def _iter_archives_sources(
+        archives: t.Iterable[Path], exclude: t.Collection[str], members: collections.deque[tuple[str, float]]
+) -> t.Iterator[tuple[str, bytes]]:
+    """
+    Yield (archive:member, mamba source) pairs, appending the name and modification time of each member to `members`
+    """
+    for archive in archives:
+        if zipfile.is_zipfile(archive):
+            archive_members = _iter_zip_members(archive)
+        else:
+            archive_members = _iter_tar_members(archive)
+        for member_name, mtime, data in archive_members:
+            if _is_mamba_member(member_name, exclude):
+                members.append((member_name, mtime))
+                yield f'{archive}:{member_name}', data
+
+
+def _iter_zip_members(archive: Path) -> t.Iterator[tuple[str, float, bytes]]:
+    with zipfile.ZipFile(archive) as zip_file:
+        for info in zip_file.infolist():
+            if not info.is_dir():
+                yield info.filename, time.mktime(info.date_time + (0, 0, -1)), zip_file.read(info)
+
+
+def _iter_tar_members(archive: Path) -> t.Iterator[tuple[str, float, bytes]]:
+    # Stream mode, so compressed tarballs are decompressed once front to back instead of seeking around
+    with tarfile.open(archive, 'r|*') as tar:
+        for info in tar:
+            if info.isfile():
+                member = tar.extractfile(info)
+                assert member is not None
+                yield info.name, info.mtime, member.read()
+
+
+def _is_mamba_member(member_name: str, exclude: t.Collection[str]) -> bool:
+    path = PurePosixPath(member_name)
+    return is_mamba_file_name(path.name) and not is_excluded_path(path, exclude)
+
+
+def _get_pytest_member_name(member_name: str) -> str:
+    path = PurePosixPath(member_name)
+    return str(path.with_name(f'test_{get_base_name(path.name)}.py'))
+
+
+def is_archive_name(path: Path) -> bool:
+    return path.name.endswith(ARCHIVE_SUFFIXES)
+
+
+class _ArchiveWriter:
+    def __init__(self, path: Path):
+        self._names: set[str] = set()
+        self._zip_file: zipfile.ZipFile | None = None
+        self._tar: tarfile.TarFile | None = None
+        self._gzip_file: gzip.GzipFile | None = None
+
+        if path.suffix == '.zip':
+            self._zip_file = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED)
+            return
+        for suffix, mode in _TAR_WRITE_MODES.items():
+            if not path.name.endswith(suffix):
+                continue
+            if mode == 'w:gz':
+                # Rather than by tarfile, which lets gzip store the current time in its header
+                self._gzip_file = gzip.GzipFile(path, 'wb', mtime=0)
+                self._tar = tarfile.open(fileobj=self._gzip_file, mode='w')
+            else:
+                self._tar = tarfile.open(path, mode)  # type: ignore
+            return
+        raise ValueError(f'Unknown archive type, expected one of {", ".join(ARCHIVE_SUFFIXES)}: {path}')
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._names
+
+    def add(self, name: str, text: str, mtime: float) -> None:
+        self._names.add(name)
+        data = text.encode()
+        if self._zip_file:
+            # Zip cannot store times before 1980, which reproducible tarballs often use
+            date_time = max(time.localtime(mtime)[:6], _ZIP_EPOCH)
+            zip_info = zipfile.ZipInfo(name, date_time=date_time)
+            zip_info.compress_type = zipfile.ZIP_DEFLATED
+            zip_info.external_attr = 0o644 << 16
+            self._zip_file.writestr(zip_info, data)
+        else:
+            assert self._tar
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(mtime)
+            info.mode = 0o644
+            self._tar.addfile(info, io.BytesIO(data))
+
+    def __enter__(self) -> _ArchiveWriter:
+        return self
+
+    def __exit__(self, *args) -> None:
+        if self._zip_file:
+            self._zip_file.close()
+        else:
+            assert self._tar
+            self._tar.close()
+            if self._gzip_file:
+                self._gzip_file.close()
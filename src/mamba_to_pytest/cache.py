@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import os
+from pathlib import Path
+
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+"""In bytes"""
+
+
+def get_default_cache_directory() -> Path:
+    cache_home = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(cache_home) / 'mamba_to_pytest'
+
+
+class ConversionCache:
+    """
+    On-disk cache of converted files, keyed by a hash of the mamba input, the scanner and the converter itself
+
+    Each entry is a file in `directory`. Its mtime is bumped on every hit so `evict` can drop the least recently used
+    entries first. Entries are written atomically so concurrent processes can share a cache.
+    """
+
+    def __init__(self, directory: Path, max_size: int = DEFAULT_MAX_SIZE):
+        self._directory = directory
+        self._max_size = max_size
+
+    def get_key(self, mamba_source: bytes, scanner: str = 'staged') -> str:
+        """
+        :param scanner: see pipeline.convert_mamba, as the tokenize scanner gives different output. Other options of
+            the conversion, e.g. streaming, give the same output.
+        """
+        digest = hashlib.sha256(_get_converter_version().encode())
+        digest.update(b'\0')
+        digest.update(scanner.encode())
+        digest.update(b'\0')
+        digest.update(mamba_source)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> str | None:
+        path = self._directory / key
+        try:
+            output = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return output.decode()
+
+    def put(self, key: str, output: str) -> None:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        path = self._directory / key
+        tmp_path = path.with_name(f'{key}.{os.getpid()}.tmp')
+        tmp_path.write_bytes(output.encode())
+        os.replace(tmp_path, path)
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits its max size"""
+        try:
+            with os.scandir(self._directory) as scanner:
+                entries = [(entry.stat(), entry.path) for entry in scanner if not entry.name.endswith('.tmp')]
+        except FileNotFoundError:
+            return
+
+        size = sum(stat.st_size for stat, _ in entries)
+        entries.sort(key=lambda entry: entry[0].st_mtime_ns)
+        for stat, path in entries:
+            if size <= self._max_size:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass  # evicted concurrently by another process
+            size -= stat.st_size
+
+
+@functools.cache
+def _get_converter_version() -> str:
+    """
+    Hash of the converter's source code
+
+    More reliable than the package version, which is not bumped for every change while developing the converter.
+    """
+    package_directory = Path(__file__).parent
+    digest = hashlib.sha256()
+    for path in sorted(package_directory.rglob('*.py')):
+        relative_path = path.relative_to(package_directory)
+        if relative_path.parts[0].startswith('tests'):
+            continue
+        digest.update(relative_path.as_posix().encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
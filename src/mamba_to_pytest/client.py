@@ -0,0 +1,102 @@
+"""
+Thin client of `mamba_to_pytest --serve`
+
+Only imports from the standard library, it would defeat the purpose of the server to import the converter itself.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import sys
+import typing as t
+from pathlib import Path
+
+
+def get_default_socket_path() -> Path:
+    runtime_directory = os.environ.get('XDG_RUNTIME_DIR') or '/tmp'
+    return Path(runtime_directory) / f'mamba_to_pytest-{os.getuid()}.sock'
+
+
+class Client:
+    """
+    Sends requests to the server, one JSON object per line in each direction
+    """
+
+    def __init__(self, socket_path: Path):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._socket.connect(os.fspath(socket_path))
+        except OSError:
+            self._socket.close()
+            raise
+        self._file = self._socket.makefile('rwb')
+
+    def convert_paths(self, paths: t.Iterable[Path], exclude: t.Collection[str] = ()) -> dict[str, t.Any]:
+        """
+        Convert files and directories like the mamba_to_pytest command does
+
+        :return: {'log': what the command would have printed}
+        """
+        return self._request({'paths': [os.path.abspath(path) for path in paths], 'exclude': list(exclude)})
+
+    def convert_source(self, source: str) -> dict[str, t.Any]:
+        """
+        :return: {'output': pytest source or None, 'error': error message or None}
+        """
+        return self._request({'source': source})
+
+    def close(self) -> None:
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self) -> Client:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _request(self, request: dict[str, t.Any]) -> dict[str, t.Any]:
+        self._file.write(json.dumps(request).encode() + b'\n')
+        self._file.flush()
+        response = json.loads(self._file.readline())
+        if 'request_error' in response:
+            raise Exception(response['request_error'])
+        return response
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog='mamba_to_pytest_client',
+        description='Convert mamba files using a running `mamba_to_pytest --serve`.',
+    )
+    parser.add_argument(
+        'paths', nargs='*', type=Path,
+        help='files or directories to convert like mamba_to_pytest does, or - to convert stdin to stdout',
+    )
+    parser.add_argument('--socket', type=Path, default=get_default_socket_path(), help='default: %(default)s')
+    parser.add_argument('--exclude', action='append', default=[], metavar='GLOB')
+    args = parser.parse_args(argv)
+
+    try:
+        client = Client(args.socket)
+    except (FileNotFoundError, ConnectionRefusedError):
+        sys.exit(
+            f'No server is listening on {args.socket}, start one with `mamba_to_pytest --serve` or convert with'
+            ' mamba_to_pytest instead'
+        )
+    with client:
+        if args.paths == [Path('-')]:
+            response = client.convert_source(sys.stdin.read())
+            if response['error'] is not None:
+                sys.exit(response['error'])
+            sys.stdout.write(response['output'])
+        else:
+            response = client.convert_paths(args.paths, exclude=args.exclude)
+            sys.stdout.write(response['log'])
+
+
+if __name__ == '__main__':
+    main()
@@ -2,22 +2,35 @@ import re
 from enum import Enum
 
 
-_TRAILING_COMMENT = r'''\s*(#.*)?'''
+ENABLED_TEST_PATTERN = re.compile(r'test_(.*)_spec.py')
+DISABLED_TEST_PATTERN = re.compile(r'disabled_(.*)_disabled.py')
 
 
-LINE_PATTERN = re.compile(r'^( *)([^ ].*)?$')
-MAMBA_IMPORT_PATTERN = re.compile(r'''^(from|import) mamba(\s|$)''')
+_TRAILING_COMMENT = r'''\s*(#.*)?'''
 
 
-_WITH_START = r'''^with\s+(description|context|describe|it|(?:before|after)[._](?:each|all))\s*'''
-WITH_START_PATTERN = re.compile(_WITH_START)
+_WITH_START = r'''with\s+(description|context|describe|it|(?:before|after)[._](?:each|all))\s*'''
 WITH_PATTERN = re.compile(_WITH_START + rf'''(?:[(]['"](.*)['"][)])?(?: as self)?:{_TRAILING_COMMENT}$''')
 
 
-CLASS_PATTERN = re.compile(r'''^class\s''')
+# Classifies a line in a single match, used with match() at its start within the whole source, so without ^. The name
+# of the last group is the kind of line, 'indent' for any other line of code.
+LINE_KIND_PATTERN = re.compile(
+    r'''(?P<blank>\s*\Z)'''
+    r'''|(?P<test_function>def test_)'''
+    r'''|(?P<indent> *)(?:'''
+    r'''(?P<tab>\t)'''
+    r'''|(?P<mamba_import>(?:from|import) mamba(?:\s|$))'''
+    r'''|(?P<comment>\#)'''
+    rf'''|(?P<with>{_WITH_START})'''
+    r'''|(?P<class>class\s)'''
+    r'''|(?P<method>def\s+(?P<method_name>\w+)\s*\(\s*self(?:\W|$))'''
+    r'''|)'''
+)
 
 
-METHOD_START_PATTERN = re.compile(r'''^def\s+(\w+)\s*\(\s*self(?:\W|$)''')
+SCANNERS = ('staged', 'table', 'fused', 'tokenize')
+"""Implementations of the line-level stages of the pipeline, see pipeline.convert_mamba"""
 
 
 class TestScope(Enum):
@@ -34,3 +47,7 @@ class TestScope(Enum):
     @property
     def fixture_name(self) -> str:
         return self._fixture_name
+
+    def __reduce_ex__(self, protocol):
+        # By name, the default of looking up the value fails as members are defined with a tuple of value and name
+        return getattr, (self.__class__, self.name)
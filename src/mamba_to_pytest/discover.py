@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import os
+import typing as t
+from fnmatch import fnmatch
+from pathlib import Path, PurePath
+
+from mamba_to_pytest.constants import ENABLED_TEST_PATTERN, DISABLED_TEST_PATTERN
+
+
+def iter_mamba_files(paths: t.Iterable[Path], exclude: t.Collection[str] = ()) -> t.Iterator[Path]:
+    """
+    Yield files as is and recursively search directories for enabled and disabled mamba files
+
+    Directories are walked lazily, in a single pass for both kinds of file, so conversion can start before the search
+    finishes. Entries are visited in sorted order to keep the output stable across runs.
+
+    :param exclude: globs matched against the name and the path of each entry found while searching directories.
+        Files which were passed explicitly are never excluded.
+    """
+    for path in paths:
+        if path.is_dir():
+            for entry in iter_mamba_file_entries(path, exclude):
+                yield Path(entry.path)
+        else:
+            yield path
+
+
+def iter_mamba_file_entries(directory: Path, exclude: t.Collection[str] = ()) -> t.Iterator[os.DirEntry]:
+    """
+    Like iter_mamba_files but for a single directory and yield the entries, which cache their stat results
+    """
+    stack = [os.fspath(directory)]
+    while stack:
+        with os.scandir(stack.pop()) as scanner:
+            entries = sorted(scanner, key=lambda entry: entry.name)
+
+        subdirectories = []
+        for entry in entries:
+            if _is_excluded(entry, exclude):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append(entry.path)
+            elif is_mamba_file_name(entry.name) and entry.is_file():
+                yield entry
+
+        # Reversed, so the first subdirectory is popped first
+        stack.extend(reversed(subdirectories))
+
+
+def is_mamba_file_name(name: str) -> bool:
+    return bool(
+        name == 'test_spec.py' or ENABLED_TEST_PATTERN.fullmatch(name) or DISABLED_TEST_PATTERN.fullmatch(name)
+    )
+
+
+def is_excluded_path(path: PurePath, exclude: t.Collection[str]) -> bool:
+    """
+    Whether the file at this relative path would be skipped while searching the directory it is relative to
+    """
+    return any(
+        fnmatch(entry.name, glob) or fnmatch(str(entry), glob)
+        for entry in (path, *path.parents[:-1])
+        for glob in exclude
+    )
+
+
+def _is_excluded(entry: os.DirEntry, exclude: t.Collection[str]) -> bool:
+    return any(fnmatch(entry.name, glob) or fnmatch(entry.path, glob) for glob in exclude)
@@ -0,0 +1,99 @@
+"""
+Queries of the git repository the files to convert live in
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import typing as t
+from pathlib import Path, PurePosixPath
+
+from mamba_to_pytest.discover import is_mamba_file_name, is_excluded_path
+
+
+def iter_changed_mamba_files(
+        paths: t.Iterable[Path], since: str, exclude: t.Collection[str] = ()
+) -> t.Iterator[Path]:
+    """
+    Yield the mamba files in `paths` which were added or modified since revision `since`, including untracked files
+    and uncommitted changes
+
+    Files come in sorted order. Renamed files count as added.
+
+    :param exclude: globs matched against the name and the path relative to the root of the repository of each file
+    """
+    paths = [os.fspath(path) for path in paths]
+    root = Path(run_git('rev-parse', '--show-toplevel').rstrip('\n'))
+    changed = run_git('diff', '--name-only', '--diff-filter=ACMR', '-z', since, '--', *paths)
+    untracked = run_git('ls-files', '--others', '--exclude-standard', '--full-name', '-z', '--', *paths)
+    names = set(changed.split('\0')) | set(untracked.split('\0'))
+    names.discard('')
+    for name in sorted(names):
+        path = PurePosixPath(name)
+        if is_mamba_file_name(path.name) and not is_excluded_path(path, exclude):
+            yield root / path
+
+
+def run_git(*args: str) -> str:
+    process = subprocess.run(('git', *args), capture_output=True, text=True)
+    if process.returncode != 0:
+        raise Exception(f'git {args[0]} failed: {process.stderr.strip()}')
+    return process.stdout
+
+
+class BlobReader:
+    """
+    Reads objects through a single long-lived `git cat-file --batch` process, rather than starting git for each
+    """
+
+    def __init__(self) -> None:
+        self._process = subprocess.Popen(
+            ('git', 'cat-file', '--batch'), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+
+    def read(self, object_name: str) -> bytes:
+        assert self._process.stdin and self._process.stdout
+        self._process.stdin.write(object_name.encode() + b'\n')
+        self._process.stdin.flush()
+        header = self._process.stdout.readline().decode()
+        if header.endswith(' missing\n'):
+            raise Exception(f'Object not found: {object_name}')
+        size = int(header.split()[2])
+        data = self._process.stdout.read(size)
+        self._process.stdout.read(1)  # Newline after the contents
+        return data
+
+    def close(self) -> None:
+        assert self._process.stdin
+        self._process.stdin.close()
+        self._process.wait()
+        assert self._process.stdout
+        self._process.stdout.close()
+
+    def __enter__(self) -> BlobReader:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def iter_tree_mamba_files(
+        revision: str, paths: t.Iterable[Path], exclude: t.Collection[str] = ()
+) -> t.Iterator[tuple[str, str]]:
+    """
+    Yield (path relative to the root of the repository, blob hash) of each mamba file in `paths` at `revision`
+    """
+    tree = run_git('ls-tree', '-r', '--full-name', '-z', revision, '--', *(os.fspath(path) for path in paths))
+    for entry in tree.split('\0'):
+        if not entry:
+            continue
+        info, name = entry.split('\t', 1)
+        _mode, object_type, object_name = info.split()
+        path = PurePosixPath(name)
+        if object_type == 'blob' and is_mamba_file_name(path.name) and not is_excluded_path(path, exclude):
+            yield name, object_name
+
+
+def resolve_commit(revision: str) -> str:
+    return run_git('rev-parse', '--verify', '--end-of-options', f'{revision}^{{commit}}').rstrip('\n')
@@ -0,0 +1,82 @@
+"""
+Conversion of mamba files at past revisions, read from the git object store without checking anything out
+"""
+
+from __future__ import annotations
+
+import shutil
+import textwrap
+import typing as t
+from pathlib import Path, PurePosixPath
+
+from mamba_to_pytest.api import convert_many
+from mamba_to_pytest.git import BlobReader, iter_tree_mamba_files, resolve_commit
+from mamba_to_pytest.main import get_base_name
+
+
+def convert_revisions(
+        revisions: t.Iterable[str],
+        paths: t.Iterable[Path],
+        out_directory: Path,
+        exclude: t.Collection[str] = (),
+        jobs: int = 1,
+        quiet: bool = False,
+        scanner: str = 'staged',
+) -> None:
+    """
+    Convert the mamba files in `paths` as they were at each revision, to out_directory/<commit hash>/<path in repo>
+
+    Files which are identical at several revisions are converted once, revisions of the same commit only once. A file
+    whose output file is already that of another file fails. Nothing in the working tree is touched, not even enabled
+    mamba files are renamed.
+
+    :param scanner: implementation of the line-level stages, see pipeline.convert_mamba
+    """
+    paths = tuple(paths)
+    # Output files per blob, each blob is only read and converted once
+    targets: dict[str, list[tuple[str, Path]]] = {}
+    # Files whose output file is that of another file, e.g. both test_a_spec.py and disabled_a_disabled.py
+    collisions: list[tuple[str, Path]] = []
+    commits: set[str] = set()
+    for revision in revisions:
+        commit = resolve_commit(revision)
+        if commit in commits:
+            continue  # e.g. both HEAD and the tag it is at
+        commits.add(commit)
+        out_files: set[Path] = set()
+        for name, blob in iter_tree_mamba_files(commit, paths, exclude):
+            path = PurePosixPath(name)
+            out_file = out_directory / commit / path.parent / f'test_{get_base_name(path.name)}.py'
+            if out_file in out_files:
+                collisions.append((f'{revision}:{name}', out_file))
+            else:
+                out_files.add(out_file)
+                targets.setdefault(blob, []).append((f'{revision}:{name}', out_file))
+
+    total = 0
+    succeeded = 0
+    for name, out_file in collisions:
+        total += 1
+        print(f'Convert {name}\n{name} failed')
+        print(f'    Output file already exists: {out_file}')
+    with BlobReader() as reader:
+        sources = ((blob, reader.read(blob)) for blob in targets)
+        for result in convert_many(sources, jobs=jobs, ordered=True, scanner=scanner):
+            first_out_file = None
+            for name, out_file in targets[result.name]:
+                total += 1
+                if result.succeeded:
+                    succeeded += 1
+                    out_file.parent.mkdir(parents=True, exist_ok=True)
+                    if first_out_file:
+                        shutil.copyfile(first_out_file, out_file)
+                    else:
+                        assert result.output is not None
+                        out_file.write_text(result.output)
+                        first_out_file = out_file
+                    if not quiet:
+                        print(f'Convert {name}\n     to {out_file}')
+                else:
+                    print(f'Convert {name}\n{name} failed')
+                    print(textwrap.indent(str(result.error), '    '))
+    print(f'{succeeded}/{total} succeeded')
@@ -0,0 +1,86 @@
+"""
+Columnar alternative to a list of line objects, see lines.py
+
+A line object costs over 100 bytes; a row of a LineTable costs 25 bytes in arrays, plus a tuple for each with-line
+and method heading. See benchmarks/bench_line_memory.py.
+"""
+
+from __future__ import annotations
+
+import enum
+import typing as t
+from array import array
+
+from mamba_to_pytest.lines import CodelessLine, LineOfCode, WithLine, ClassHeading, MethodHeading
+
+
+class LineKind(enum.IntEnum):
+    CODELESS = 0
+    CODE = 1
+    WITH = 2
+    """Detail: (variable, name, comment)"""
+    CLASS = 3
+    METHOD = 4
+    """Detail: name"""
+    SPLIT_OFF_COMMENT = 5
+    """The trailing comment of a with-line as a line of code of its own, spans just the comment. See line_text."""
+
+
+class LineTable:
+    """
+    Classified lines as spans of one source text, a row per line in parallel columns
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.kinds = array('b')
+        self.indents = array('i')
+        self.starts = array('q')
+        self.ends = array('q')
+
+        self.detail_indexes = array('i')
+        """Index in details, -1 if the line has none"""
+
+        self.details: list[t.Any] = []
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def append(self, kind: LineKind, indent: int, start: int, end: int, detail: t.Any = None) -> None:
+        self.kinds.append(kind)
+        self.indents.append(indent)
+        self.starts.append(start)
+        self.ends.append(end)
+        if detail is None:
+            self.detail_indexes.append(-1)
+        else:
+            self.detail_indexes.append(len(self.details))
+            self.details.append(detail)
+
+    def get_detail(self, row: int) -> t.Any:
+        index = self.detail_indexes[row]
+        return None if index < 0 else self.details[index]
+
+    def get_text(self, row: int) -> str:
+        text = self.source[self.starts[row]:self.ends[row]]
+        if self.kinds[row] == LineKind.SPLIT_OFF_COMMENT:
+            return ' ' * self.indents[row] + text
+        return text
+
+    def get_line(self, row: int) -> CodelessLine | LineOfCode:
+        """The row as a line object, referencing the same span"""
+        kind = self.kinds[row]
+        span = {'source': self.source, 'start': self.starts[row], 'end': self.ends[row]}
+        if kind == LineKind.CODELESS:
+            return CodelessLine(**span)
+        elif kind == LineKind.WITH:
+            variable, name, comment = self.get_detail(row)
+            return WithLine(indent=self.indents[row], variable=variable, name=name, comment=comment, **span)
+        elif kind == LineKind.CLASS:
+            return ClassHeading(indent=self.indents[row], **span)
+        elif kind == LineKind.METHOD:
+            return MethodHeading(indent=self.indents[row], name=self.get_detail(row), **span)
+        elif kind == LineKind.SPLIT_OFF_COMMENT:
+            return LineOfCode(indent=self.indents[row], line=self.get_text(row))
+        else:
+            return LineOfCode(indent=self.indents[row], **span)
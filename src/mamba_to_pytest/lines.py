@@ -1,48 +1,154 @@
+"""
+Classified lines of a mamba file
+
+Rather than a copy of its text, each line references a span of the source it was read from, which is shared by all
+lines when the whole source is at hand. The text is only sliced out when asked for, and consecutive lines are joined
+into a block of code with a single slice.
+
+Lines are immutable slotted classes rather than dataclasses, as there is one per line of a huge spec and their text
+is a property rather than a field. They compare and print by their text rather than their span. They are constructed
+like before they had spans, e.g. LineOfCode(4, '    x\\n'), except that the fields after the line are keyword-only.
+"""
+
 from __future__ import annotations
 
-import dataclasses
+import typing as t
+
+
+if t.TYPE_CHECKING:
+    L = t.TypeVar('L', bound='_Line')
+
+_set_field = object.__setattr__
+
+
+class _Line:
+    __slots__ = ('source', 'start', 'end')
+
+    _FIELDS: t.ClassVar[tuple[str, ...]] = ()
+    """Fields besides the line, which compare and print along with its text"""
+
+    source: str
+    start: int
+    end: int
+
+    def __init__(self, line: str | None = None, *, source: str = '', start: int = 0, end: int = 0):
+        """
+        :param line: text of the line, including trailing newline. Or else give the `source` it is a span of.
+        """
+        self._set_span(line, source, start, end)
+
+    def _set_span(self, line: str | None, source: str, start: int, end: int) -> None:
+        if line is not None:
+            source, start, end = line, 0, len(line)
+        _set_field(self, 'source', source)
+        _set_field(self, 'start', start)
+        _set_field(self, 'end', end)
+
+    @property
+    def line(self) -> str:
+        """Original line, including trailing newline"""
+        return self.source[self.start:self.end]
+
+    def replace(self: L, **changes: t.Any) -> L:
+        """Copy with some fields changed, keeping the span rather than copying the line unless it is changed"""
+        fields = {name: getattr(self, name) for name in self._FIELDS}
+        if 'line' not in changes:
+            fields.update(source=self.source, start=self.start, end=self.end)
+        fields.update(changes)
+        return type(self)(**fields)
+
+    def __setattr__(self, name: str, value: t.Any) -> None:
+        raise AttributeError(f'cannot assign to field {name!r}')
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f'cannot delete field {name!r}')
+
+    def __getstate__(self) -> dict[str, t.Any]:
+        # Pickled for convert_mamba_parallel, which unpickles by setting the fields otherwise
+        return {name: getattr(self, name) for name in (*self._FIELDS, 'source', 'start', 'end')}
 
+    def __setstate__(self, state: dict[str, t.Any]) -> None:
+        for name, value in state.items():
+            _set_field(self, name, value)
 
-@dataclasses.dataclass(frozen=True)
-class CodelessLine:
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._get_key() == other._get_key()  # type: ignore
+
+    def __hash__(self) -> int:
+        return hash(self._get_key())
+
+    def __repr__(self) -> str:
+        fields = [f'line={self.line!r}'] + [f'{name}={getattr(self, name)!r}' for name in self._FIELDS]
+        return f'{type(self).__name__}({", ".join(fields)})'
+
+    def _get_key(self) -> tuple:
+        return self.line, *(getattr(self, name) for name in self._FIELDS)
+
+
+class CodelessLine(_Line):
     """
     A line which has no actual code, e.g. a blank line or a full-line comment
     """
-    line: str
+
+    __slots__ = ()
 
 
-@dataclasses.dataclass(frozen=True)
-class LineOfCode:
+class LineOfCode(_Line):
+    __slots__ = ('indent',)
+    _FIELDS = ('indent',)
+
     indent: int
 
-    line: str
-    """Original line, including trailing newline"""
+    def __init__(self, indent: int, line: str | None = None, *, source: str = '', start: int = 0, end: int = 0):
+        _set_field(self, 'indent', indent)
+        self._set_span(line, source, start, end)
 
     def to_line_of_code(self) -> LineOfCode:
-        return LineOfCode(indent=self.indent, line=self.line)
+        return LineOfCode(indent=self.indent, source=self.source, start=self.start, end=self.end)
 
 
-@dataclasses.dataclass(frozen=True)
 class WithLine(LineOfCode):
     """
     Represents: with {variable}('{}'): {comment}
     """
 
+    __slots__ = ('variable', 'name', 'comment')
+    _FIELDS = ('indent', 'variable', 'name', 'comment')
+
     variable: str
     name: str | None
 
     comment: str | None
     """Trailing comment, starting from the '#'"""
 
+    def __init__(
+            self,
+            indent: int,
+            line: str | None = None,
+            *,
+            variable: str,
+            name: str | None,
+            comment: str | None,
+            source: str = '',
+            start: int = 0,
+            end: int = 0,
+    ):
+        super().__init__(indent, line, source=source, start=start, end=end)
+        _set_field(self, 'variable', variable)
+        _set_field(self, 'name', name)
+        _set_field(self, 'comment', comment)
+
 
-@dataclasses.dataclass(frozen=True)
 class ClassHeading(LineOfCode):
     """
     E.g. class Foo:
     """
 
+    __slots__ = ()
+
 
-@dataclasses.dataclass(frozen=True)
 class MethodHeading(LineOfCode):
     """
     E.g. def foo(self, x):
@@ -51,4 +157,26 @@ class MethodHeading(LineOfCode):
     first line of a multiline heading: e.g. def foo(self
     """
 
+    __slots__ = ('name',)
+    _FIELDS = ('indent', 'name')
+
     name: str
+
+    def __init__(
+            self, indent: int, line: str | None = None, *, name: str, source: str = '', start: int = 0, end: int = 0
+    ):
+        super().__init__(indent, line, source=source, start=start, end=end)
+        _set_field(self, 'name', name)
+
+
+def join_lines(lines: t.Sequence[CodelessLine | LineOfCode]) -> str:
+    """
+    The text of the lines, sliced out of their source at once if they are consecutive spans of it
+    """
+    first = lines[0]
+    end = first.start
+    for line in lines:
+        if line.source is not first.source or line.start != end:
+            return ''.join(line.line for line in lines)
+        end = line.end
+    return first.source[first.start:end]
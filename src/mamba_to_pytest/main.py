@@ -1,109 +1,621 @@
+"""
+Command line interface
+
+Imports of anything not needed by every run are deferred to where they are used, to keep startup fast for
+`--help`, runs where every file is taken from the cache and the many short runs of hooks. This includes the
+conversion pipeline itself. Check with benchmarks/bench_import_time.py after changing imports.
+"""
+
+from __future__ import annotations
+
+import argparse
+import collections
+import io
+import os
 import re
-import sys
-import traceback
+import time
 import typing as t
+from contextlib import contextmanager, redirect_stdout, ExitStack
+from functools import partial
 from pathlib import Path
-from textwrap import indent
 
-from mamba_to_pytest.node_visitors.add_methods_to_fixtures import add_methods_to_fixtures
-from mamba_to_pytest.node_visitors.combine_setup_teardown import combine_setup_teardown
-from mamba_to_pytest.node_visitors.convert_self_methods import convert_self_methods
-from mamba_to_pytest.node_visitors.convert_self_vars import convert_self_vars
-from mamba_to_pytest.node_visitors.flatten_singleton_test_contexts import flatten_singleton_test_contexts
-from mamba_to_pytest.node_visitors.validate import validate_node
-from mamba_to_pytest.node_visitors.write import write_tree
-from mamba_to_pytest.steps.group_plain_lines_into_blocks import group_plain_lines_into_blocks
-from mamba_to_pytest.steps.group_lines_into_tree import group_lines_into_tree
-from mamba_to_pytest.steps.ignore_class_and_def_bodies import ignore_class_and_def_bodies
-from mamba_to_pytest.steps.split_mamba import split_mamba
-from mamba_to_pytest.steps.split_off_comments import split_off_comments
+from mamba_to_pytest.constants import ENABLED_TEST_PATTERN, DISABLED_TEST_PATTERN, SCANNERS
+
+if t.TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+
+    from mamba_to_pytest.cache import ConversionCache
+    from mamba_to_pytest.profiling import StageStats, SlowestProfiles
+    from mamba_to_pytest.report import FileStats, RunReport
+
+
+_PENDING_PER_JOB = 4
+"""Files submitted to the pool ahead per worker process, keeps workers busy without listing all files up front"""
+
+_FILES_ONLY_OPTIONS = (
+    '--since', '--shard', '--queue', '--cache-dir', '--cache-size', '--streaming', '--file-jobs', '--profile',
+    '--profile-dump', '--profile-top', '--report', '--watch', '--watch-interval',
+)
+"""Options which only apply to converting the files in the paths, not to --revision or --archive-out"""
+
+_SERVE_INCOMPATIBLE_OPTIONS = (
+    '--exclude', '--since', '--shard', '--queue', '--revision', '--revision-out', '--archive-out', '--streaming',
+    '--file-jobs', '--profile', '--profile-dump', '--profile-top', '--report', '--quiet', '--watch', '--watch-interval',
+)
+"""Options which only apply to converting the paths given on the command line, not to the requests of --serve"""
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog='mamba_to_pytest', description='Convert mamba test files to pytest.')
+    parser.add_argument(
+        'paths', nargs='*', type=Path,
+        help='test_*_spec.py or disabled_*_disabled.py files, or directories to search for them recursively',
+    )
+    parser.add_argument(
+        '--exclude', action='append', default=[], metavar='GLOB',
+        help='skip files and directories whose name or path matches this glob while searching directories',
+    )
+    parser.add_argument(
+        '--since', metavar='REV',
+        help=(
+            'only convert files in the paths (default: the current directory) which were added or modified since this'
+            ' git revision, including uncommitted and untracked files'
+        ),
+    )
+    parser.add_argument(
+        '--shard', metavar='i/n',
+        help=(
+            'split the files into n shards of about the same total size and only convert shard i (1-based), e.g. to'
+            ' spread a migration across CI machines'
+        ),
+    )
+    parser.add_argument(
+        '--queue', type=Path, metavar='DIR',
+        help=(
+            'share the files with other mamba_to_pytest --queue DIR processes, e.g. on other hosts sharing DIR over'
+            ' NFS: each converts the files nobody claimed yet, then prints the output of all of them'
+        ),
+    )
+    parser.add_argument(
+        '--revision', action='append', default=[], metavar='REV',
+        help=(
+            'convert the files in the paths (default: the current directory) as they were at this git revision,'
+            ' without checking it out, to --revision-out. Can be repeated'
+        ),
+    )
+    parser.add_argument(
+        '--revision-out', type=Path, metavar='DIR',
+        help='where to write the files converted at each --revision, to DIR/<commit hash>/<path in the repository>',
+    )
+    parser.add_argument(
+        '--archive-out', type=Path, metavar='ARCHIVE',
+        help=(
+            'treat the paths as tar or zip archives, convert the mamba files inside them without extracting them and'
+            ' write the pytest files into this new archive, a .zip, .tar, .tar.gz, .tgz, .tar.bz2 or .tar.xz'
+        ),
+    )
+    parser.add_argument(
+        '-j', '--jobs', type=int,
+        help='number of files to convert in parallel (default: number of CPUs, 1 with --file-jobs)',
+    )
+    _add_cache_arguments(parser)
+    parser.add_argument(
+        '--streaming', action='store_true',
+        help=(
+            'convert and write one top-level context at a time instead of building the tree of the whole file, which'
+            ' lowers peak memory on huge files. Same output, cannot be combined with --profile'
+        ),
+    )
+    parser.add_argument(
+        '--file-jobs', type=int, default=1, metavar='N',
+        help=(
+            'spread the top-level contexts of each file across N processes, for files with very many of them. Files'
+            ' are then converted one at a time, so cannot be combined with --jobs more than 1. Same output, cannot be'
+            ' combined with --profile (default: %(default)s)'
+        ),
+    )
+    _add_scanner_argument(parser)
+    parser.add_argument(
+        '--profile', action='store_true',
+        help='print time, peak memory and line/node counts of each conversion stage of each file',
+    )
+    parser.add_argument(
+        '--profile-dump', type=Path, metavar='DIR',
+        help='write cProfile stats of the slowest files to this directory, for use with pstats or snakeviz',
+    )
+    parser.add_argument(
+        '--profile-top', type=int, default=10, metavar='N',
+        help='number of slowest files to write cProfile stats of (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--report', type=Path, metavar='FILE',
+        help='write a JSON record per file and a summary record with throughput metrics to this JSON lines file',
+    )
+    parser.add_argument(
+        '-q', '--quiet', action='store_true',
+        help='only print failures and the summary, not each converted file',
+    )
+    parser.add_argument(
+        '--watch', action='store_true',
+        help='keep running and reconvert disabled_*_disabled.py files in the given paths whenever they change',
+    )
+    parser.add_argument(
+        '--watch-interval', type=float, default=1.0, metavar='SECONDS',
+        help='how often to check for changes in watch mode (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--serve', action='store_true',
+        help=(
+            'instead of converting, serve conversion requests of mamba_to_pytest_client on a Unix socket, saving the'
+            ' interpreter startup and imports on each request. Takes the cache and --scanner options'
+        ),
+    )
+    parser.add_argument(
+        '--socket', type=Path,
+        help='path of the Unix socket to serve on (default: $XDG_RUNTIME_DIR/mamba_to_pytest-<uid>.sock)',
+    )
+    args = parser.parse_args(argv)
+    if args.socket and not args.serve:
+        parser.error('--socket only applies to --serve')
+    if args.serve:
+        if args.paths:
+            parser.error('--serve takes no paths, mamba_to_pytest_client sends them')
+        _reject_options(parser, args, '--serve', _SERVE_INCOMPATIBLE_OPTIONS)
+    if args.jobs is None:
+        args.jobs = 1 if args.file_jobs > 1 else os.cpu_count() or 1
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+    if args.shard:
+        from mamba_to_pytest.shard import parse_shard
+        try:
+            args.shard = parse_shard(args.shard)
+        except argparse.ArgumentTypeError as exc:
+            parser.error(f'--shard: {exc}')
+    if args.file_jobs < 1:
+        parser.error('--file-jobs must be at least 1')
+    if args.jobs > 1 and args.file_jobs > 1:
+        # Each of the jobs would start a pool of its own, jobs * file_jobs processes in all
+        parser.error('--jobs and --file-jobs cannot both be more than 1')
+    if args.profile and (args.streaming or args.file_jobs > 1):
+        parser.error('--streaming and --file-jobs cannot be combined with --profile')
+    if bool(args.revision) != bool(args.revision_out):
+        parser.error('--revision and --revision-out must be used together')
+    if args.watch:
+        for path in args.paths:
+            if not path.is_dir() and not DISABLED_TEST_PATTERN.fullmatch(path.name):
+                parser.error(f'--watch only converts disabled_*_disabled.py files: {path}')
+    if args.revision:
+        _reject_options(parser, args, '--revision', (*_FILES_ONLY_OPTIONS, '--archive-out'))
+    if args.archive_out:
+        _reject_options(parser, args, '--archive-out', _FILES_ONLY_OPTIONS)
+        from mamba_to_pytest.archive import is_archive_name, ARCHIVE_SUFFIXES
+        if not is_archive_name(args.archive_out):
+            parser.error(f'--archive-out must end with one of {", ".join(ARCHIVE_SUFFIXES)}: {args.archive_out}')
+    cache = _create_cache(args)
+    if args.profile_dump:
+        from mamba_to_pytest.profiling import SlowestProfiles
+        slowest_profiles = SlowestProfiles(args.profile_dump, count=args.profile_top)
+    else:
+        slowest_profiles = None
+    if args.serve:
+        from mamba_to_pytest.client import get_default_socket_path
+        from mamba_to_pytest.server import serve
+        serve(args.socket or get_default_socket_path(), cache=cache, scanner=args.scanner)
+        return
+    if args.revision:
+        from mamba_to_pytest.history import convert_revisions
+        convert_revisions(
+            args.revision, args.paths or [Path()], args.revision_out, exclude=args.exclude, jobs=args.jobs,
+            quiet=args.quiet, scanner=args.scanner,
+        )
+        return
+    if args.archive_out:
+        from mamba_to_pytest.archive import convert_archives
+        convert_archives(
+            args.paths, args.archive_out, exclude=args.exclude, jobs=args.jobs, quiet=args.quiet, scanner=args.scanner,
+        )
+        return
+    if args.watch:
+        from mamba_to_pytest.watch import DisabledFileWatcher, watch
+        convert = partial(
+            convert_mamba_files, raise_if_failed=False, cache=cache, profile=args.profile, streaming=args.streaming,
+            file_jobs=args.file_jobs, scanner=args.scanner,
+        )
+        watch(DisabledFileWatcher(args.paths, exclude=args.exclude), convert, interval=args.watch_interval)
+        return
+
+    if args.since:
+        from mamba_to_pytest.git import iter_changed_mamba_files
+        files = iter_changed_mamba_files(args.paths or [Path()], args.since, exclude=args.exclude)
+    else:
+        from mamba_to_pytest.discover import iter_mamba_files
+        files = iter_mamba_files(args.paths, exclude=args.exclude)
+    if args.shard:
+        from mamba_to_pytest.shard import get_shard
+        files = get_shard(files, *args.shard)
+    with ExitStack() as stack:
+        if args.report:
+            from mamba_to_pytest.report import RunReport
+            report = RunReport(stack.enter_context(args.report.open('w')))
+        else:
+            report = None
+        if args.queue:
+            from mamba_to_pytest.work_queue import convert_queued_mamba_files
+            convert_queued_mamba_files(
+                files, args.queue, jobs=args.jobs, cache=cache, report=report, quiet=args.quiet,
+                streaming=args.streaming, file_jobs=args.file_jobs, scanner=args.scanner,
+            )
+            return
+        convert_mamba_files(
+            files,
+            raise_if_failed=False,
+            jobs=args.jobs,
+            cache=cache,
+            profile=args.profile,
+            slowest_profiles=slowest_profiles,
+            report=report,
+            quiet=args.quiet,
+            streaming=args.streaming,
+            file_jobs=args.file_jobs,
+            scanner=args.scanner,
+        )
+
+
+def _reject_options(
+        parser: argparse.ArgumentParser, args: argparse.Namespace, option: str, incompatible_options: t.Iterable[str]
+) -> None:
+    given = []
+    for incompatible_option in incompatible_options:
+        dest = incompatible_option.lstrip('-').replace('-', '_')
+        if getattr(args, dest) != parser.get_default(dest):
+            given.append(incompatible_option)
+    if given:
+        parser.error(f'{option} cannot be combined with {", ".join(given)}')
+
+
+def _add_scanner_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        '--scanner', choices=SCANNERS, default='staged',
+        help=(
+            'implementation of the line-level stages: staged passes line objects between stages, table passes a'
+            ' table of spans of the source, fused runs them all in a single loop. Same output. tokenize works on'
+            ' logical lines, so also converts multiline strings and method headings, but is slower'
+            ' (default: %(default)s)'
+        ),
+    )
+
+
+def _add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        '--no-cache', action='store_true',
+        help='always convert files instead of reusing output cached from converting the exact same file before',
+    )
+    parser.add_argument(
+        '--cache-dir', type=Path,
+        help='where to cache converted files (default: $XDG_CACHE_HOME/mamba_to_pytest or ~/.cache/mamba_to_pytest)',
+    )
+    parser.add_argument(
+        '--cache-size', type=int, metavar='MiB',
+        help='evict the least recently used files from the cache when it grows larger than this (default: 256)',
+    )
+
+
+def _create_cache(args: argparse.Namespace) -> ConversionCache | None:
+    if args.no_cache:
+        return None
+    from mamba_to_pytest.cache import ConversionCache, get_default_cache_directory, DEFAULT_MAX_SIZE
+    return ConversionCache(
+        args.cache_dir or get_default_cache_directory(),
+        max_size=DEFAULT_MAX_SIZE if args.cache_size is None else args.cache_size * 2**20,
+    )
+
+
+class ConvertOptions(t.NamedTuple):
+    """
+    NamedTuple rather than a dataclass like elsewhere, as importing dataclasses would add to the startup time
+    """
+
+    raise_if_failed: bool
+    cache: ConversionCache | None
+    profile: bool
+    collect_cprofile_stats: bool
+    streaming: bool = False
+    file_jobs: int = 1
+    scanner: str = 'staged'
+
+
+class FileResult(t.NamedTuple):
+    mamba_file: Path
 
-ENABLED_TEST_PATTERN = re.compile(r'test_(.*)_spec.py')
-DISABLED_TEST_PATTERN = re.compile(r'disabled_(.*)_disabled.py')
+    log: str
+    """Everything printed while converting the file"""
 
+    error: str | None
 
-def main():
-    convert_mamba_files((Path(path) for path in sys.argv[1:]), raise_if_failed=False)
+    exception: Exception | None
+    """The original exception, only kept when it is to be raised"""
 
+    stats: FileStats | None
+    """None if failed"""
 
-def convert_mamba_files(files: t.Iterable[Path], raise_if_failed: bool) -> None:
+    seconds: float
+
+    cprofile_stats: dict | None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+def convert_mamba_files(
+        files: t.Iterable[Path],
+        raise_if_failed: bool,
+        jobs: int = 1,
+        cache: ConversionCache | None = None,
+        profile: bool = False,
+        slowest_profiles: SlowestProfiles | None = None,
+        report: RunReport | None = None,
+        quiet: bool = False,
+        streaming: bool = False,
+        file_jobs: int = 1,
+        scanner: str = 'staged',
+) -> None:
+    """
+    Convert mamba files, using a pool of `jobs` processes if more than 1
+
+    Output is printed in the order of `files` regardless of the number of jobs.
+
+    :param profile: print stats of each conversion stage of each file
+    :param slowest_profiles: if given, collect cProfile stats of each file and dump those of the slowest ones
+    :param report: if given, add a record of each file and a summary to it
+    :param quiet: only print the output of failed files and the summary
+    :param streaming: convert one top-level context at a time, see convert_mamba_streaming
+    :param file_jobs: if more than 1, spread the top-level contexts of each file across this many processes, see
+        convert_mamba_parallel
+    :param scanner: implementation of the line-level stages, see convert_mamba
+    """
+    start = time.perf_counter()
+    options = ConvertOptions(
+        raise_if_failed=raise_if_failed,
+        cache=cache,
+        profile=profile,
+        collect_cprofile_stats=slowest_profiles is not None,
+        streaming=streaming,
+        file_jobs=file_jobs,
+        scanner=scanner,
+    )
     total = 0
     succeeded = 0
-    for mamba_file in files:
+    with _map_files(files, options, jobs) as results:
+        for result in results:
+            if not quiet or not result.succeeded:
+                print(result.log, end='')
+            if report:
+                report.add_file(result.mamba_file, result.error, result.stats, result.seconds)
+            total += 1
+            if slowest_profiles and result.cprofile_stats is not None:
+                slowest_profiles.add(str(result.mamba_file), result.seconds, result.cprofile_stats)
+            if result.succeeded:
+                succeeded += 1
+            elif result.exception:
+                raise result.exception
+    print(f'{succeeded}/{total} succeeded')
+    if report:
+        report.add_summary(wall_seconds=time.perf_counter() - start)
+    if cache:
+        cache.evict()
+    if slowest_profiles:
+        for path in slowest_profiles.dump():
+            print(f'Wrote cProfile stats to {path}')
+
+
+@contextmanager
+def _map_files(
+        files: t.Iterable[Path], options: ConvertOptions, jobs: int
+) -> t.Iterator[t.Iterable[FileResult]]:
+    convert = partial(convert_mamba_file_logged, options=options)
+    if jobs == 1:
+        yield map(convert, files)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            yield _submit_files(executor, convert, files, jobs * _PENDING_PER_JOB)
+
+
+def _submit_files(
+        executor: Executor, convert: t.Callable[[Path], FileResult], files: t.Iterable[Path], max_pending: int
+) -> t.Iterator[FileResult]:
+    # Unlike executor.map, which lists all files before yielding the first result, see also api.convert_many
+    queue: collections.deque[Future[FileResult]] = collections.deque()
+    for file in files:
+        if len(queue) >= max_pending:
+            yield queue.popleft().result()
+        queue.append(executor.submit(convert, file))
+    while queue:
+        yield queue.popleft().result()
+
+
+def convert_mamba_file_logged(mamba_file: Path, options: ConvertOptions) -> FileResult:
+    log = io.StringIO()
+    stage_stats: list[StageStats] = []
+    on_stage = stage_stats.append if options.profile else None
+    if options.collect_cprofile_stats:
+        import cProfile
+        cprofile = cProfile.Profile()
+    else:
+        cprofile = None
+    stats = None
+    error = None
+    exception = None
+    with redirect_stdout(log):
         print(f'Convert {mamba_file}')
-        total += 1
+        start = time.perf_counter()
+        if cprofile:
+            cprofile.enable()
         try:
             match = DISABLED_TEST_PATTERN.fullmatch(mamba_file.name)
             if match:
-                convert_disabled_mamba_file(mamba_file, match)
+                stats = convert_disabled_mamba_file(
+                    mamba_file, match, options.cache, on_stage, options.streaming, options.file_jobs,
+                    options.scanner,
+                )
             else:
-                convert_enabled_mamba_file(mamba_file)
-            succeeded += 1
+                stats = convert_enabled_mamba_file(
+                    mamba_file, options.cache, on_stage, options.streaming, options.file_jobs,
+                    options.scanner,
+                )
         except Exception as exc:
             print(f'{mamba_file} failed')
 
+            from mamba_to_pytest.api import get_error_message
+            error = get_error_message(exc)
             if exc.args:
-                error = indent(str(exc), '    ')
+                from textwrap import indent
+                print(indent(error, '    '))
             else:
-                error = traceback.format_exc()
-                error = error.splitlines()[-2]
-
-            print(error)
-            if raise_if_failed:
-                raise
-    print(f'{succeeded}/{total} succeeded')
+                print(error)
+            if options.raise_if_failed:
+                exception = exc
+        finally:
+            if cprofile:
+                cprofile.disable()
+        seconds = time.perf_counter() - start
 
+        if stage_stats:
+            from mamba_to_pytest.profiling import format_stage_stats
+            print(format_stage_stats(stage_stats))
+        if options.profile:
+            print(f'    total: {seconds * 1000:.2f} ms')
 
-def convert_enabled_mamba_file(mamba_file: Path) -> None:
-    if mamba_file.name == 'test_spec.py':
-        base_name = 'it'
+    if cprofile:
+        cprofile.create_stats()
+        cprofile_stats = cprofile.stats  # type: ignore
     else:
-        match = ENABLED_TEST_PATTERN.fullmatch(mamba_file.name)
-        assert match, f'Does not look like a mamba test file: {mamba_file}'
-        base_name = match.group(1)
+        cprofile_stats = None
+
+    return FileResult(
+        mamba_file=mamba_file,
+        log=log.getvalue(),
+        error=error,
+        exception=exception,
+        stats=stats,
+        seconds=seconds,
+        cprofile_stats=cprofile_stats,
+    )
 
+
+def convert_enabled_mamba_file(
+        mamba_file: Path,
+        cache: ConversionCache | None = None,
+        on_stage: t.Callable[[StageStats], None] | None = None,
+        streaming: bool = False,
+        file_jobs: int = 1,
+        scanner: str = 'staged',
+) -> FileStats:
+    base_name = get_base_name(mamba_file.name)
     out_file = mamba_file.with_name(f'test_{base_name}.py')
     assert not out_file.exists(), f'Output file already exists: {out_file}'
-    convert_mamba_file(mamba_file, out_file)
+    stats = convert_mamba_file(mamba_file, out_file, cache, on_stage, streaming, file_jobs, scanner)
 
     # Make sure the mamba file no longer runs, while still allowing us to easily convert it again later in case
     # something went wrong
     disabled_file = mamba_file.with_name(f'disabled_{base_name}_disabled.py')
     print(f"    and renaming the original file so it no longer runs\n     to {disabled_file}")
     mamba_file.rename(disabled_file)
+    return stats
+
+
+def get_base_name(mamba_file_name: str) -> str:
+    """
+    E.g. foo for test_foo_spec.py or disabled_foo_disabled.py, which are converted to test_foo.py
+    """
+    if mamba_file_name == 'test_spec.py':
+        return 'it'
+    match = ENABLED_TEST_PATTERN.fullmatch(mamba_file_name) or DISABLED_TEST_PATTERN.fullmatch(mamba_file_name)
+    assert match, f'Does not look like a mamba test file: {mamba_file_name}'
+    return match.group(1)
 
 
-def convert_disabled_mamba_file(mamba_file: Path, match: re.Match) -> None:
+def convert_disabled_mamba_file(
+        mamba_file: Path,
+        match: re.Match,
+        cache: ConversionCache | None = None,
+        on_stage: t.Callable[[StageStats], None] | None = None,
+        streaming: bool = False,
+        file_jobs: int = 1,
+        scanner: str = 'staged',
+) -> FileStats:
     base_name = match.group(1)
     out_name = f'test_{base_name}.py'
     out_file = mamba_file.with_name(out_name)
-    convert_mamba_file(mamba_file, out_file)
+    return convert_mamba_file(mamba_file, out_file, cache, on_stage, streaming, file_jobs, scanner)
 
 
-def convert_mamba_file(mamba_file: Path, out_file: Path) -> None:
+def convert_mamba_file(
+        mamba_file: Path,
+        out_file: Path,
+        cache: ConversionCache | None = None,
+        on_stage: t.Callable[[StageStats], None] | None = None,
+        streaming: bool = False,
+        file_jobs: int = 1,
+        scanner: str = 'staged',
+) -> FileStats:
+    """
+    :param on_stage: if given, profile each stage of the conversion and pass its stats to this callback. Not called
+        when the output is taken from the cache.
+    :param streaming: convert one top-level context at a time, see convert_mamba_streaming. Cannot be profiled.
+    :param file_jobs: if more than 1, see convert_mamba_parallel. Cannot be profiled.
+    :param scanner: implementation of the line-level stages, see convert_mamba
+    """
     print(f'     to {out_file}')
-    with mamba_file.open() as mamba_input:
+    mamba_source = mamba_file.read_bytes()
+    if cache:
+        key = cache.get_key(mamba_source, scanner)
+        output = cache.get(key)
+    else:
+        output = None
+
+    if output is None:
+        from mamba_to_pytest import pipeline
+
+        pytest_output = io.StringIO()
         try:
-            with out_file.open('w') as out:
-                convert_mamba(mamba_input, out)
+            if file_jobs > 1:
+                assert on_stage is None, 'Parallel conversion of a file cannot be profiled'
+                pipeline.convert_mamba_parallel(mamba_source, pytest_output, jobs=file_jobs, scanner=scanner)
+            elif streaming:
+                assert on_stage is None, 'Streaming conversion cannot be profiled'
+                pipeline.convert_mamba_streaming(mamba_source, pytest_output, scanner=scanner)
+            else:
+                pipeline.convert_mamba(mamba_source, pytest_output, on_stage, scanner=scanner)
         except Exception:
-            out_file.unlink()
+            # Do not leave behind output of a previous conversion
+            out_file.unlink(missing_ok=True)
             raise
+        output = pytest_output.getvalue()
+        if cache:
+            cache.put(key, output)
+        out_file.write_text(output)
+    elif not (out_file.exists() and out_file.read_text() == output):
+        # Only write cached output if it differs, leaving the mtime alone for tools which watch it
+        out_file.write_text(output)
+
+    from mamba_to_pytest.report import FileStats, count_lines
+    return FileStats(
+        input_lines=count_lines(mamba_source),
+        input_bytes=len(mamba_source),
+        output_lines=count_lines(output),
+        output_bytes=out_file.stat().st_size,
+    )
+
 
 
-def convert_mamba(mamba_input: t.TextIO, pytest_output: t.TextIO):
-    lines = split_mamba(mamba_input)
-    lines = ignore_class_and_def_bodies(lines)
-    lines = split_off_comments(lines)
-    blocks_and_lines = group_plain_lines_into_blocks(lines)
-    root = group_lines_into_tree(blocks_and_lines)
-    root = flatten_singleton_test_contexts(root)
-    root = combine_setup_teardown(root)
-    root = add_methods_to_fixtures(root)
-    validate_node(root)
-    root = convert_self_methods(root)
-    root = convert_self_vars(root)
-    write_tree(root, pytest_output)
+def __getattr__(name: str) -> t.Any:
+    # convert_mamba moved to the pipeline module, which is imported on first use like everywhere else in here
+    if name == 'convert_mamba':
+        from mamba_to_pytest.pipeline import convert_mamba
+        return convert_mamba
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 if __name__ == '__main__':
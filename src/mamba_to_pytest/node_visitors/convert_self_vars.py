@@ -2,6 +2,7 @@ from __future__ import annotations
 import dataclasses
 import io
 import re
+import typing as t
 
 from mamba_to_pytest import nodes
 from mamba_to_pytest.constants import TestScope
@@ -19,6 +20,11 @@ class _ConvertSelfVars(NodeVisitor):
         self._in_self_scope = False
         self._replaced_self_vars: bool = False
 
+    @property
+    def uses_pytest_pkg(self) -> bool:
+        """Whether any node converted so far needs pytest to be imported"""
+        return self._uses_pytest_pkg
+
     def visit_root(self, node: nodes.RootNode) -> nodes.RootNode:
         node = self._replace_children(node)
         if self._uses_pytest_pkg:
@@ -134,3 +140,17 @@ class _ConvertSelfVars(NodeVisitor):
 
 def convert_self_vars(root: nodes.RootNode) -> nodes.RootNode:
     return root.accept(_ConvertSelfVars())
+
+
+def convert_self_vars_of_top_level_nodes(
+        top_level_nodes: t.Iterable[nodes.NodeBase]
+) -> t.Iterator[tuple[nodes.NodeBase, bool]]:
+    """
+    Like convert_self_vars, but for one child of the root at a time, numbering fixtures across all of them
+
+    Yields each converted node along with whether pytest needs to be imported for it or any node before it. Unlike
+    convert_self_vars, the import is left to the caller.
+    """
+    visitor = _ConvertSelfVars()
+    for node in top_level_nodes:
+        yield node.accept(visitor), visitor.uses_pytest_pkg
@@ -12,14 +12,14 @@ class _ValidationVisitor(NodeVisitor):
         self._in_self_scope: bool = False
 
     def visit_root(self, node: nodes.RootNode) -> None:
-        self._assert_no_duplicate_names(node.children)
+        self.assert_no_duplicate_names(node.children)
         self._visit_children(node)
 
     def visit_test_context(self, node: nodes.TestContext) -> None:
         starts_self_scope = self._in_self_scope
         if starts_self_scope:
             self._in_self_scope = True
-        self._assert_no_duplicate_names(node.children)
+        self.assert_no_duplicate_names(node.children)
         self._visit_children(node)
         if starts_self_scope:
             self._in_self_scope = False
@@ -43,8 +43,9 @@ class _ValidationVisitor(NodeVisitor):
         assert self._in_self_scope, f'Methods outside a `with as self:` context are not supported:\n{node}'
 
     @staticmethod
-    def _assert_no_duplicate_names(children: t.Iterable[nodes.NodeBase]):
-        seen = set()
+    def assert_no_duplicate_names(children: t.Iterable[nodes.NodeBase], seen: set[str] | None = None):
+        if seen is None:
+            seen = set()
         for child in children:
             if isinstance(child, nodes.Test) or isinstance(child, nodes.TestContext):
                 if child.name in seen:
@@ -56,3 +57,15 @@ class _ValidationVisitor(NodeVisitor):
 
 def validate_node(root: nodes.RootNode):
     root.accept(_ValidationVisitor())
+
+
+def validate_top_level_nodes(top_level_nodes: t.Iterable[nodes.NodeBase]) -> t.Iterator[nodes.NodeBase]:
+    """
+    Like validate_node, but for one child of the root at a time, yielding each once validated
+    """
+    visitor = _ValidationVisitor()
+    seen: set[str] = set()
+    for node in top_level_nodes:
+        visitor.assert_no_duplicate_names((node,), seen)
+        node.accept(visitor)
+        yield node
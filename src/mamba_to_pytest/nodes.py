@@ -3,6 +3,9 @@ Poor man's AST
 
 ast.parse/unparse does not preserve comments, formatting, ... unparse also doesn't work for complex cases,
 though nor does my AST.
+
+Nodes are slotted, as there is one per block of code and line of a huge spec. Slotted dataclasses are recreated by the
+decorator, which breaks super() without arguments, so base class methods are called by name instead.
 """
 
 from __future__ import annotations
@@ -15,7 +18,7 @@ from mamba_to_pytest.constants import TestScope
 from mamba_to_pytest.node_visitors import base as v
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, slots=True)
 class NodeBase(abc.ABC):
     def __post_init__(self):
         assert self.indent >= 0
@@ -25,17 +28,17 @@ class NodeBase(abc.ABC):
         ...
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, slots=True)
 class CodeWrapperNodeBase(NodeBase, abc.ABC):
     indent: int
     body: BlockOfCode
 
     def __post_init__(self):
-        super().__post_init__()
+        NodeBase.__post_init__(self)
         assert self.body.indent > self.indent
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, slots=True)
 class RootNode(NodeBase):
     children: tuple[NodeBase, ...]
 
@@ -47,11 +50,17 @@ class RootNode(NodeBase):
         return 0
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, slots=True)
 class BlockOfCode(NodeBase):
     indent: int
     body: str
 
+    continuation_lines: frozenset[int] = frozenset()
+    """
+    Indexes of the lines of the body which continue the statement of the line before, e.g. the rest of a multiline
+    string. These are left alone when reindenting. Only known when lines were split into logical lines.
+    """
+
     def accept(self, visitor: v.NodeVisitor) -> t.Any:
         return visitor.visit_block_of_code(self)
 
@@ -63,7 +72,11 @@ class BlockOfCode(NodeBase):
         )
 
     def _reindent_lines(self, indent: int) -> t.Iterable[str]:
-        for line in self.body.splitlines():
+        for index, line in enumerate(self.body.removesuffix('\n').split('\n')):
+            if index in self.continuation_lines:
+                yield line
+                continue
+
             # Comments can have less indent than the block, because we treated those lines as having no indent. We
             # need to be careful not to chop off the actual front of a comment when dedenting beyond its indent.
             line_indent = len(line) - len(line.lstrip())
@@ -74,7 +87,7 @@ class BlockOfCode(NodeBase):
                 yield ' ' * indent + line[min(self.indent, line_indent):]
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, slots=True)
 class TestContext(NodeBase):
     name: str
     indent: int
@@ -82,8 +95,12 @@ class TestContext(NodeBase):
     method_fixture: Fixture | None
     other_children: tuple[NodeBase, ...]
 
+    children: tuple[NodeBase, ...] = dataclasses.field(init=False, repr=False, compare=False)
+    """The fixtures followed by the other children, computed once"""
+
     def __post_init__(self):
-        super().__post_init__()
+        NodeBase.__post_init__(self)
+        object.__setattr__(self, 'children', tuple(self._iter_children()))
         assert self.children  # must have at least 1
         if self.class_fixture:
             assert self.class_fixture.scope == TestScope.CLASS
@@ -100,10 +117,6 @@ class TestContext(NodeBase):
     def __str__(self):
         return f'TestContext({self.name})'
 
-    @property
-    def children(self) -> tuple[NodeBase, ...]:
-        return tuple(self._iter_children())
-
     def _iter_children(self) -> t.Iterable[NodeBase]:
         if self.class_fixture:
             yield self.class_fixture
@@ -112,7 +125,7 @@ class TestContext(NodeBase):
         yield from self.other_children
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, slots=True)
 class Test(CodeWrapperNodeBase):
     name: str
 
@@ -123,7 +136,7 @@ class Test(CodeWrapperNodeBase):
         return f'Test({self.name})'
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, slots=True)
 class TestSetup(CodeWrapperNodeBase):
     scope: TestScope
 
@@ -131,7 +144,7 @@ class TestSetup(CodeWrapperNodeBase):
         return visitor.visit_test_setup(self)
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, slots=True)
 class TestTeardown(CodeWrapperNodeBase):
     scope: TestScope
 
@@ -139,7 +152,7 @@ class TestTeardown(CodeWrapperNodeBase):
         return visitor.visit_test_teardown(self)
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, slots=True)
 class Fixture(NodeBase):
     setup: TestSetup | None
     teardown: TestTeardown | None
@@ -178,7 +191,7 @@ class Fixture(NodeBase):
         return self.methods[0].indent
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, slots=True)
 class Method(CodeWrapperNodeBase):
     """
     The node analog to a MethodHeading line
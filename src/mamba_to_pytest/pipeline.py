@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import io
+import typing as t
+from concurrent.futures import ProcessPoolExecutor
+
+from mamba_to_pytest.node_visitors.add_methods_to_fixtures import add_methods_to_fixtures
+from mamba_to_pytest.node_visitors.combine_setup_teardown import combine_setup_teardown
+from mamba_to_pytest.node_visitors.convert_self_methods import convert_self_methods
+from mamba_to_pytest.node_visitors.convert_self_vars import convert_self_vars, convert_self_vars_of_top_level_nodes
+from mamba_to_pytest.node_visitors.flatten_singleton_test_contexts import flatten_singleton_test_contexts
+from mamba_to_pytest.node_visitors.validate import validate_node, validate_top_level_nodes
+from mamba_to_pytest.node_visitors.write import write_tree
+from mamba_to_pytest.lines import WithLine, MethodHeading
+from mamba_to_pytest.nodes import NodeBase, RootNode, BlockOfCode
+from mamba_to_pytest.profiling import StageProfiler, StageStats
+from mamba_to_pytest.steps.group_plain_lines_into_blocks import group_plain_lines_into_blocks, group_table_into_blocks
+from mamba_to_pytest.steps.group_lines_into_tree import group_lines_into_tree, iter_top_level_nodes
+from mamba_to_pytest.steps.ignore_class_and_def_bodies import ignore_class_and_def_bodies, \
+    ignore_class_and_def_bodies_in_table
+from mamba_to_pytest.steps.scan_fused import scan_fused
+from mamba_to_pytest.steps.split_mamba import split_mamba, MambaInput, split_mamba_into_table, \
+    split_mamba_into_logical_lines
+from mamba_to_pytest.steps.split_off_comments import split_off_comments, split_off_comments_in_table
+
+
+_CHUNK_SIZE = 4
+"""Number of top-level nodes handed to a worker process at a time in convert_mamba_parallel"""
+
+
+def convert_mamba(
+        mamba_input: MambaInput,
+        pytest_output: t.TextIO,
+        on_stage: t.Callable[[StageStats], None] | None = None,
+        scanner: str = 'staged',
+):
+    """
+    :param mamba_input: text, or bytes such as a memory-mapped file, which are decoded like Python decodes source
+    :param on_stage: if given, profile each stage and pass its stats to this callback
+    :param scanner: implementation of the line-level stages, one of constants.SCANNERS. These give the same blocks:
+        'staged' passes line objects through a generator per stage, 'table' passes a LineTable of spans of the
+        source and 'fused' runs all of them in a single loop. 'tokenize' is like 'staged', but on logical rather than
+        physical lines, so it also converts multiline strings and method headings.
+    """
+    run: t.Callable[..., t.Any] = _run_stage if on_stage is None else StageProfiler(on_stage)
+    blocks_and_lines = _scan(mamba_input, scanner, run)
+    root = run(group_lines_into_tree, blocks_and_lines)
+    root = run(flatten_singleton_test_contexts, root)
+    root = run(combine_setup_teardown, root)
+    root = run(add_methods_to_fixtures, root)
+    run(validate_node, root)
+    root = run(convert_self_methods, root)
+    root = run(convert_self_vars, root)
+    run(write_tree, root, pytest_output)
+
+
+def convert_mamba_streaming(mamba_input: MambaInput, pytest_output: t.TextIO, scanner: str = 'staged'):
+    """
+    Like convert_mamba, but never holds the tree of the whole file
+
+    Each child of the root, e.g. a top-level description, runs through all visitors and is written as soon as the
+    line after it is read. Only the state which spans those children is carried over: the numbering of fixtures
+    without return value, the names seen at the top level and whether pytest needs to be imported. Output before the
+    first child which needs the import is held back, so the output is the same as that of convert_mamba.
+    """
+    top_level_nodes = map(_convert_top_level_node, _iter_top_level_nodes(mamba_input, scanner))
+    _write_top_level_nodes(top_level_nodes, pytest_output)
+
+
+def convert_mamba_parallel(mamba_input: MambaInput, pytest_output: t.TextIO, jobs: int, scanner: str = 'staged'):
+    """
+    Like convert_mamba_streaming, but the visitors which work on each child of the root on its own run on a pool of
+    `jobs` processes
+
+    Meant for files with many independent top-level descriptions. The visitors whose state spans children run in this
+    process on the results in order, so the output is the same as that of convert_mamba.
+    """
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        top_level_nodes = executor.map(
+            _convert_top_level_node, _iter_top_level_nodes(mamba_input, scanner), chunksize=_CHUNK_SIZE
+        )
+        _write_top_level_nodes(top_level_nodes, pytest_output)
+
+
+def _scan(
+        mamba_input: MambaInput, scanner: str, run: t.Callable[..., t.Any]
+) -> t.Iterable[BlockOfCode | WithLine | MethodHeading]:
+    """
+    The line-level stages
+    """
+    if scanner == 'table':
+        table = run(split_mamba_into_table, mamba_input)
+        table = run(ignore_class_and_def_bodies_in_table, table)
+        table = run(split_off_comments_in_table, table)
+        return run(group_table_into_blocks, table)
+    elif scanner == 'fused':
+        return run(scan_fused, mamba_input)
+    elif scanner == 'tokenize':
+        lines = run(split_mamba_into_logical_lines, mamba_input)
+    else:
+        assert scanner == 'staged', f'Unknown scanner: {scanner}'
+        lines = run(split_mamba, mamba_input)
+    lines = run(ignore_class_and_def_bodies, lines)
+    lines = run(split_off_comments, lines)
+    return run(group_plain_lines_into_blocks, lines)
+
+
+def scan_mamba(mamba_input: MambaInput, scanner: str = 'staged') -> t.Iterable[BlockOfCode | WithLine | MethodHeading]:
+    """
+    The blocks and lines which the line-level stages make of the input, i.e. the input of the tree-level stages
+    """
+    return _scan(mamba_input, scanner, _run_stage)
+
+
+def _iter_top_level_nodes(mamba_input: MambaInput, scanner: str) -> t.Iterator[NodeBase]:
+    return iter_top_level_nodes(scan_mamba(mamba_input, scanner))
+
+
+def _convert_top_level_node(node: NodeBase) -> NodeBase:
+    root = RootNode(children=(node,))
+    root = flatten_singleton_test_contexts(root)
+    root = combine_setup_teardown(root)
+    root = add_methods_to_fixtures(root)
+    root = convert_self_methods(root)
+    (node,) = root.children
+    return node
+
+
+def _write_top_level_nodes(top_level_nodes: t.Iterable[NodeBase], pytest_output: t.TextIO):
+    # Validated after rather than before convert_self_methods as in convert_mamba, which makes no difference as that
+    # changes neither names nor structure
+    top_level_nodes = validate_top_level_nodes(top_level_nodes)
+
+    held_back: io.StringIO | None = io.StringIO()
+    for node, uses_pytest_pkg in convert_self_vars_of_top_level_nodes(top_level_nodes):
+        if held_back is not None and uses_pytest_pkg:
+            pytest_output.write('import pytest\n')
+            pytest_output.write(held_back.getvalue())
+            held_back = None
+        write_tree(RootNode(children=(node,)), pytest_output if held_back is None else held_back)
+    if held_back is not None:
+        pytest_output.write(held_back.getvalue())
+
+
+def _run_stage(stage: t.Callable[..., t.Any], *args: t.Any) -> t.Any:
+    return stage(*args)
@@ -0,0 +1,139 @@
+"""
+Opt-in instrumentation of the conversion pipeline
+"""
+
+from __future__ import annotations
+
+import collections.abc
+import dataclasses
+import heapq
+import marshal
+import time
+import tracemalloc
+import typing as t
+from pathlib import Path
+
+from mamba_to_pytest import nodes
+from mamba_to_pytest.line_table import LineTable
+
+
+@dataclasses.dataclass(frozen=True)
+class StageStats:
+    stage: str
+    seconds: float
+
+    peak_memory: int
+    """Peak of memory allocated during the stage on top of what was allocated before it, in bytes"""
+
+    input_count: int | None
+    """Number of lines, blocks or nodes the stage received, None if the input is a stream"""
+
+    output_count: int | None
+    """Same for its output"""
+
+
+class StageProfiler:
+    """
+    Runs a pipeline stage, reporting StageStats of it to a callback
+
+    Generator stages are drained into a list, as the work of a lazy stage would otherwise be attributed to the next
+    one. Memory is traced with tracemalloc, which slows conversion down considerably.
+    """
+
+    def __init__(self, on_stage: t.Callable[[StageStats], None]):
+        self._on_stage = on_stage
+
+    def __call__(self, stage: t.Callable[..., t.Any], *args: t.Any) -> t.Any:
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            result = stage(*args)
+            if isinstance(result, collections.abc.Iterator):
+                result = list(result)
+            seconds = time.perf_counter() - start
+            peak_memory = tracemalloc.get_traced_memory()[1] - memory_before
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+
+        output = args[0] if result is None else result  # validate_node only inspects its input
+        self._on_stage(StageStats(
+            stage=stage.__name__,
+            seconds=seconds,
+            peak_memory=peak_memory,
+            input_count=_count(args[0]),
+            output_count=_count(output),
+        ))
+        return result
+
+
+def _count(value: t.Any) -> int | None:
+    if isinstance(value, nodes.RootNode):
+        return count_nodes(value)
+    elif isinstance(value, list) or isinstance(value, LineTable):
+        return len(value)
+    return None
+
+
+def count_nodes(node: nodes.NodeBase) -> int:
+    """
+    Number of nodes in the tree of `node`, including itself and its blocks of code
+    """
+    if isinstance(node, nodes.RootNode) or isinstance(node, nodes.TestContext):
+        children: t.Iterable[nodes.NodeBase] = node.children
+    elif isinstance(node, nodes.CodeWrapperNodeBase):
+        children = (node.body,)
+    elif isinstance(node, nodes.Fixture):
+        children = (*filter(None, (node.setup, node.teardown)), *node.methods)
+    else:
+        children = ()
+    return 1 + sum(count_nodes(child) for child in children)
+
+
+def format_stage_stats(stats: t.Iterable[StageStats]) -> str:
+    lines = [f'    {"stage":<36} {"ms":>9} {"peak KiB":>10} {"in":>8} {"out":>8}']
+    for stat in stats:
+        lines.append(
+            f'    {stat.stage:<36} {stat.seconds * 1000:>9.2f} {stat.peak_memory / 1024:>10.1f}'
+            f' {_format_count(stat.input_count):>8} {_format_count(stat.output_count):>8}'
+        )
+    return '\n'.join(lines)
+
+
+def _format_count(count: int | None) -> str:
+    return '-' if count is None else str(count)
+
+
+class SlowestProfiles:
+    """
+    Keeps the cProfile stats of the slowest files and dumps them in the format pstats and snakeviz read
+    """
+
+    def __init__(self, directory: Path, count: int):
+        self._directory = directory
+        self._count = count
+        self._heap: list[tuple[float, int, str, dict]] = []  # min-heap, so the fastest is dropped first
+        self._added = 0
+
+    def add(self, name: str, seconds: float, cprofile_stats: dict) -> None:
+        entry = (seconds, self._added, name, cprofile_stats)
+        self._added += 1
+        if len(self._heap) < self._count:
+            heapq.heappush(self._heap, entry)
+        else:
+            heapq.heappushpop(self._heap, entry)
+
+    def dump(self) -> list[Path]:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        paths = []
+        slowest_first = sorted(self._heap, reverse=True)
+        for rank, (seconds, _, name, cprofile_stats) in enumerate(slowest_first, start=1):
+            path = self._directory / f'{rank:03}_{Path(name).name}.prof'
+            with path.open('wb') as file:
+                marshal.dump(cprofile_stats, file)
+            paths.append(path)
+        return paths
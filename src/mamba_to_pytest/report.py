@@ -0,0 +1,88 @@
+"""
+Machine-readable report of a conversion run, one JSON record per line
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import typing as t
+from pathlib import Path
+
+
+@dataclasses.dataclass(frozen=True)
+class FileStats:
+    input_lines: int
+    input_bytes: int
+    output_lines: int
+    output_bytes: int
+
+
+class RunReport:
+    """
+    Writes a record per converted file followed by a summary record with throughput metrics
+
+    Records are written as they come in so the report can be tailed during long runs.
+    """
+
+    def __init__(self, out: t.TextIO):
+        self._out = out
+        self._files = 0
+        self._succeeded = 0
+        self._input_lines = 0
+        self._input_bytes = 0
+        self._output_lines = 0
+        self._conversion_seconds = 0.0
+
+    def add_file(self, mamba_file: Path, error: str | None, stats: FileStats | None, seconds: float) -> None:
+        self._files += 1
+        self._conversion_seconds += seconds
+        if error is None:
+            self._succeeded += 1
+        if stats:
+            self._input_lines += stats.input_lines
+            self._input_bytes += stats.input_bytes
+            self._output_lines += stats.output_lines
+
+        self._write({
+            'type': 'file',
+            'path': str(mamba_file),
+            'status': 'failed' if error else 'succeeded',
+            'error': error,
+            **(dataclasses.asdict(stats) if stats else {}),
+            'seconds': seconds,
+        })
+
+    def add_summary(self, wall_seconds: float) -> None:
+        """
+        :param wall_seconds: duration of the whole run, throughput is based on this rather than on the sum of the time
+            spent on each file, as files may have been converted in parallel
+        """
+        self._write({
+            'type': 'summary',
+            'files': self._files,
+            'succeeded': self._succeeded,
+            'failed': self._files - self._succeeded,
+            'input_lines': self._input_lines,
+            'input_bytes': self._input_bytes,
+            'output_lines': self._output_lines,
+            'conversion_seconds': self._conversion_seconds,
+            'wall_seconds': wall_seconds,
+            'files_per_second': _per_second(self._files, wall_seconds),
+            'lines_per_second': _per_second(self._input_lines, wall_seconds),
+        })
+
+    def _write(self, record: dict[str, t.Any]) -> None:
+        self._out.write(json.dumps(record) + '\n')
+
+
+def _per_second(count: int, seconds: float) -> float | None:
+    return count / seconds if seconds else None
+
+
+def count_lines(text: str | bytes) -> int:
+    newline = '\n' if isinstance(text, str) else b'\n'
+    lines = text.count(newline)  # type: ignore
+    if text and not text.endswith(newline):  # type: ignore
+        lines += 1
+    return lines
@@ -0,0 +1,86 @@
+"""
+Conversion daemon, see client.py for the protocol
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import socket
+import socketserver
+import typing as t
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from mamba_to_pytest.api import convert_mamba_source, ConversionError
+from mamba_to_pytest.cache import ConversionCache
+from mamba_to_pytest.discover import iter_mamba_files
+from mamba_to_pytest.main import convert_mamba_files
+
+
+class ConversionServer(socketserver.UnixStreamServer):
+    """
+    Handles one request at a time, as file conversion output is captured by redirecting stdout
+    """
+
+    def __init__(self, socket_path: Path, cache: ConversionCache | None, scanner: str = 'staged'):
+        self.cache = cache
+        self.scanner = scanner
+        super().__init__(os.fspath(socket_path), _RequestHandler)
+
+    def handle_request_object(self, request: dict[str, t.Any]) -> dict[str, t.Any]:
+        if 'source' in request:
+            try:
+                return {'output': convert_mamba_source(request['source'], scanner=self.scanner), 'error': None}
+            except ConversionError as exc:
+                return {'output': None, 'error': exc.message}
+        elif 'paths' in request:
+            log = io.StringIO()
+            with redirect_stdout(log):
+                files = iter_mamba_files((Path(path) for path in request['paths']), request.get('exclude', ()))
+                convert_mamba_files(files, raise_if_failed=False, cache=self.cache, scanner=self.scanner)
+            return {'log': log.getvalue()}
+        else:
+            raise ValueError(f'Expected either a source or paths: {request}')
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: ConversionServer
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                response = self.server.handle_request_object(json.loads(line))
+            except Exception as exc:
+                response = {'request_error': f'{type(exc).__name__}: {exc}'}
+            self.wfile.write(json.dumps(response).encode() + b'\n')
+            self.wfile.flush()
+
+
+def serve(socket_path: Path, cache: ConversionCache | None, scanner: str = 'staged') -> None:
+    """
+    Serve until interrupted
+    """
+    _remove_stale_socket(socket_path)
+    with ConversionServer(socket_path, cache, scanner) as server:
+        print(f'Listening on {socket_path}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            socket_path.unlink(missing_ok=True)
+
+
+def _remove_stale_socket(socket_path: Path) -> None:
+    """Remove a socket left behind by a server which was killed, but not that of a running server"""
+    if not socket_path.exists():
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(os.fspath(socket_path))
+        except ConnectionRefusedError:
+            socket_path.unlink()
+        else:
+            raise Exception(f'A server is already listening on {socket_path}')
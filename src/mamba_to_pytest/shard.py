@@ -0,0 +1,55 @@
+"""
+Splitting of the files to convert across machines
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import os
+import typing as t
+from pathlib import Path
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """
+    Parse i/n, e.g. 2/3 for the second of three shards
+    """
+    index, _, count = value.partition('/')
+    try:
+        shard = int(index), int(count)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'expected i/n, e.g. 2/3: {value}')
+    if not 1 <= shard[0] <= shard[1]:
+        raise argparse.ArgumentTypeError(f'expected 1 <= i <= n: {value}')
+    return shard
+
+
+def get_shard(files: t.Iterable[Path], index: int, count: int) -> list[Path]:
+    """
+    The files of shard `index` (1-based) of `count`, in their original order
+
+    Files are spread so each shard gets about the same total size: largest first, each to the shard with the least in
+    it so far. Ties are broken by path and shard number, so every machine computes the same shards from the same files.
+    """
+    files = list(files)
+    sizes = [_get_size(file) for file in files]
+    by_size = sorted(range(len(files)), key=lambda i: (-sizes[i], os.fspath(files[i])))
+
+    # (total size, shard number)
+    loads = [(0, shard) for shard in range(1, count + 1)]
+    in_shard = set()
+    for i in by_size:
+        load, shard = heapq.heappop(loads)
+        if shard == index:
+            in_shard.add(i)
+        heapq.heappush(loads, (load + sizes[i], shard))
+    return [file for i, file in enumerate(files) if i in in_shard]
+
+
+def _get_size(file: Path) -> int:
+    try:
+        return file.stat().st_size
+    except FileNotFoundError:
+        # Still assign it to a shard, where it fails like any other missing file
+        return 0
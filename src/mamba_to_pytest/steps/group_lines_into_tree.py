@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import typing as t
 
-from more_itertools import one, peekable
+from more_itertools import one
 
 from mamba_to_pytest.constants import TestScope
 from mamba_to_pytest.lines import WithLine, MethodHeading, LineOfCode
@@ -11,27 +11,45 @@ from mamba_to_pytest.nodes import NodeBase, BlockOfCode, RootNode, Test, TestTea
 
 
 def group_lines_into_tree(blocks_and_lines: t.Iterable[BlockOfCode | WithLine | MethodHeading]) -> RootNode:
-    children = _convert_descendants(peekable(blocks_and_lines))
-    return RootNode(children=tuple(children))
+    return RootNode(children=tuple(iter_top_level_nodes(blocks_and_lines)))
 
 
-def _convert_descendants(descendants: peekable[BlockOfCode | WithLine | MethodHeading]) -> t.Iterable[NodeBase]:
-    """Convert child nodes of a parent WithLine or the root"""
-    for descendant in descendants:
+def iter_top_level_nodes(blocks_and_lines: t.Iterable[BlockOfCode | WithLine | MethodHeading]) -> t.Iterator[NodeBase]:
+    """
+    Like group_lines_into_tree, but yield each child of the root as soon as the line after it is read
+
+    A single pass with an explicit stack of the open headings, rather than recursion, so it takes the same time per line
+    at any nesting depth.
+    """
+    stack: list[tuple[WithLine | MethodHeading, list[NodeBase]]] = []
+    """Each open heading with the children converted so far, from the outermost heading"""
+
+    for descendant in blocks_and_lines:
+        yield from _close_headings(stack, descendant.indent)
         if isinstance(descendant, WithLine) or isinstance(descendant, MethodHeading):
-            heading = descendant
-            heading_descendants = peekable(_iter_descendants_of_parent(descendants, parent_indent=heading.indent))
-            children = tuple(_convert_descendants(heading_descendants))
-            yield _convert_block_heading(heading, children)
+            stack.append((descendant, []))
+        elif stack:
+            stack[-1][1].append(descendant)
         else:
             yield descendant
-
-
-def _iter_descendants_of_parent(
-        blocks_and_lines: peekable[BlockOfCode | WithLine | MethodHeading], parent_indent: int
-) -> t.Iterable[BlockOfCode | WithLine | MethodHeading]:
-    while blocks_and_lines and blocks_and_lines.peek().indent > parent_indent:
-        yield next(blocks_and_lines)
+    yield from _close_headings(stack, None)
+
+
+def _close_headings(
+        stack: list[tuple[WithLine | MethodHeading, list[NodeBase]]], indent: int | None
+) -> t.Iterator[NodeBase]:
+    """
+    Convert the open headings indented at least `indent`, or all if None, yielding those at the top level
+
+    Indents increase up the stack, as each heading is a descendant of the one below it.
+    """
+    while stack and (indent is None or indent <= stack[-1][0].indent):
+        heading, children = stack.pop()
+        node = _convert_block_heading(heading, tuple(children))
+        if stack:
+            stack[-1][1].append(node)
+        else:
+            yield node
 
 
 def _convert_block_heading(line: WithLine | MethodHeading, children: tuple[NodeBase, ...]) -> NodeBase:
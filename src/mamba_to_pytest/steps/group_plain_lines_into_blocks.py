@@ -1,7 +1,8 @@
 from __future__ import annotations
 import typing as t
 
-from mamba_to_pytest.lines import LineOfCode, WithLine, CodelessLine, MethodHeading
+from mamba_to_pytest.line_table import LineKind, LineTable
+from mamba_to_pytest.lines import LineOfCode, WithLine, CodelessLine, MethodHeading, join_lines
 from mamba_to_pytest.nodes import BlockOfCode
 
 
@@ -12,9 +13,16 @@ def group_plain_lines_into_blocks(
 
 
 class _LineGrouper:
+    """
+    Linear in the number of lines: the body indent is kept up to date as lines are added, and the body is joined once
+    """
+
     def __init__(self):
         self._body_lines: list[LineOfCode | CodelessLine] = []
 
+        self._body_indent: int | None = None
+        """Indent of the first line of code of the current block, None if it has none (yet)"""
+
     def __call__(self, lines: t.Iterable[LineOfCode | CodelessLine]) -> t.Iterable[BlockOfCode | WithLine | MethodHeading]:
         for line in lines:
             if isinstance(line, WithLine) or isinstance(line, MethodHeading):
@@ -23,37 +31,94 @@ class _LineGrouper:
             else:
                 if self._has_block and not self._is_line_in_current_block(line):
                     yield from self._finish_block_if_any()
-                self._body_lines.append(line)
+                self._add_line(line)
         yield from self._finish_block_if_any()
 
     @property
     def _has_block(self):
         return bool(self._body_lines)
 
-    @property
-    def _body_indent(self) -> int | None:
-        assert self._body_lines
-        for line in self._body_lines:
-            if not isinstance(line, CodelessLine):
-                return line.indent
-        return None
+    def _add_line(self, line: LineOfCode | CodelessLine) -> None:
+        self._body_lines.append(line)
+        if self._body_indent is None and not isinstance(line, CodelessLine):
+            self._body_indent = line.indent
 
     def _is_line_in_current_block(self, line: LineOfCode | CodelessLine):
         if isinstance(line, CodelessLine):
             return True
-        body_indent = self._body_indent
-        if body_indent is None:
+        if self._body_indent is None:
             return True
-        return line.indent >= body_indent
+        return line.indent >= self._body_indent
 
     def _finish_block_if_any(self) -> t.Iterable[BlockOfCode]:
         if not self._has_block:
             return
 
-        body = ''.join(line.line for line in self._body_lines)
+        body = join_lines(self._body_lines)
         indent = self._body_indent
         if indent is None:
             indent = 999999  # a block of blank lines, this hack is hopefully sufficient for the next steps to work
-        block = BlockOfCode(indent=indent, body=body)
+        block = BlockOfCode(indent=indent, body=body, continuation_lines=self._get_continuation_lines(body))
         self._body_lines = []
+        self._body_indent = None
         yield block
+
+    def _get_continuation_lines(self, body: str) -> frozenset[int]:
+        # Only logical lines span several physical lines, see split_mamba_into_logical_lines
+        if body.count('\n') == len(self._body_lines):
+            return frozenset()
+        continuation_lines: set[int] = set()
+        index = 0
+        for line in self._body_lines:
+            line_count = line.line.count('\n')
+            continuation_lines.update(range(index + 1, index + line_count))
+            index += line_count
+        return frozenset(continuation_lines)
+
+
+def group_table_into_blocks(table: LineTable) -> t.Iterable[BlockOfCode | WithLine | MethodHeading]:
+    """
+    Like group_plain_lines_into_blocks, but from a LineTable
+
+    A block of consecutive rows is sliced out of the source at once.
+    """
+    block_start: int | None = None
+    """First row of the current block"""
+
+    body_indent: int | None = None
+    for row, kind in enumerate(table.kinds):
+        if kind == LineKind.WITH or kind == LineKind.METHOD:
+            if block_start is not None:
+                yield _create_block(table, block_start, row, body_indent)
+                block_start = None
+            line = table.get_line(row)
+            assert isinstance(line, WithLine) or isinstance(line, MethodHeading)
+            yield line
+        else:
+            if kind != LineKind.CODELESS:
+                indent = table.indents[row]
+                if block_start is not None and body_indent is not None and indent < body_indent:
+                    yield _create_block(table, block_start, row, body_indent)
+                    block_start = None
+                if block_start is None or body_indent is None:
+                    body_indent = indent
+            if block_start is None:
+                block_start = row
+                if kind == LineKind.CODELESS:
+                    body_indent = None
+    if block_start is not None:
+        yield _create_block(table, block_start, len(table), body_indent)
+
+
+def _create_block(table: LineTable, start: int, end: int, indent: int | None) -> BlockOfCode:
+    # Rows are consecutive lines of the source unless a mamba import was dropped or a comment split off
+    is_contiguous = LineKind.SPLIT_OFF_COMMENT not in table.kinds[start:end] and all(
+        table.ends[row] == table.starts[row + 1] for row in range(start, end - 1)
+    )
+    if is_contiguous:
+        body = table.source[table.starts[start]:table.ends[end - 1]]
+    else:
+        body = ''.join(table.get_text(row) for row in range(start, end))
+    if indent is None:
+        indent = 999999  # a block of blank lines, see _LineGrouper
+    return BlockOfCode(indent=indent, body=body)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import typing as t
 
+from mamba_to_pytest.line_table import LineKind, LineTable
 from mamba_to_pytest.lines import LineOfCode, CodelessLine, ClassHeading, MethodHeading
 
 
@@ -19,3 +20,24 @@ def ignore_class_and_def_bodies(lines: t.Iterable[LineOfCode | CodelessLine]) ->
                     line = line.to_line_of_code()
                 active_scope = line
             yield line
+
+
+def ignore_class_and_def_bodies_in_table(table: LineTable) -> LineTable:
+    """
+    Like ignore_class_and_def_bodies, but on a LineTable, whose kinds are changed in place
+    """
+    kinds = table.kinds
+    active_indent: int | None = None
+    for row, kind in enumerate(kinds):
+        if kind == LineKind.CODELESS:
+            continue
+        indent = table.indents[row]
+        if active_indent is not None and indent > active_indent:
+            kinds[row] = LineKind.CODE
+        else:
+            active_indent = None
+            if kind == LineKind.CLASS or kind == LineKind.METHOD:
+                if kind == LineKind.CLASS:
+                    kinds[row] = LineKind.CODE
+                active_indent = indent
+    return table
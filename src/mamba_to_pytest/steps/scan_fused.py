@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import typing as t
+
+from mamba_to_pytest.line_table import LineKind
+from mamba_to_pytest.lines import WithLine, MethodHeading
+from mamba_to_pytest.nodes import BlockOfCode
+from mamba_to_pytest.steps.split_mamba import MambaInput, classify_line, iter_line_spans
+
+
+def scan_fused(mamba_input: MambaInput) -> t.Iterable[BlockOfCode | WithLine | MethodHeading]:
+    """
+    split_mamba, ignore_class_and_def_bodies, split_off_comments and group_plain_lines_into_blocks in a single loop
+
+    Gives the same blocks as those stages, which remain the reference implementation, without a line object per line.
+    Lazy like them.
+    """
+    block = _BlockBuilder()
+
+    active_indent: int | None = None
+    """Indent of the class or method heading whose body is ignored"""
+
+    for source, start, end in iter_line_spans(mamba_input):
+        classified = classify_line(source, start, end)
+        if not classified:
+            continue
+        kind, indent, detail = classified
+
+        if kind != LineKind.CODELESS:
+            if active_indent is not None and indent > active_indent:
+                kind = LineKind.CODE
+            else:
+                active_indent = None
+                if kind == LineKind.CLASS:
+                    kind = LineKind.CODE
+                    active_indent = indent
+                elif kind == LineKind.METHOD:
+                    active_indent = indent
+
+        if kind == LineKind.WITH:
+            variable, name, comment = detail
+            if comment:
+                yield from block.add_code(indent, ' ' * indent + comment + '\n')
+            yield from block.finish()
+            yield WithLine(
+                indent=indent, variable=variable, name=name, comment=None, source=source, start=start, end=end,
+            )
+        elif kind == LineKind.METHOD:
+            yield from block.finish()
+            yield MethodHeading(indent=indent, name=detail, source=source, start=start, end=end)
+        elif kind == LineKind.CODELESS:
+            block.add(None, source, start, end)
+        else:
+            yield from block.add_code(indent, source, start, end)
+    yield from block.finish()
+
+
+class _BlockBuilder:
+    """
+    Collects the lines of a block as spans, merging consecutive spans of the same source
+    """
+
+    def __init__(self):
+        self._pieces: list[str] = []
+
+        self._source: str | None = None
+        """Source of the pending span, None if there is none"""
+
+        self._start = 0
+        self._end = 0
+
+        self._body_indent: int | None = None
+        """Indent of the first line of code of the block, None if it has none yet"""
+
+    def add(self, indent: int | None, source: str, start: int = 0, end: int | None = None) -> None:
+        """
+        :param indent: None for a codeless line
+        """
+        if end is None:
+            end = len(source)
+        if self._body_indent is None:
+            self._body_indent = indent
+        if source is self._source and start == self._end:
+            self._end = end
+            return
+        if self._source is not None:
+            self._pieces.append(self._source[self._start:self._end])
+        self._source = source
+        self._start = start
+        self._end = end
+
+    def add_code(self, indent: int, source: str, start: int = 0, end: int | None = None) -> t.Iterable[BlockOfCode]:
+        """
+        Add a line of code, first finishing the block if the line is indented less than its body
+        """
+        if self._body_indent is not None and indent < self._body_indent:
+            yield from self.finish()
+        self.add(indent, source, start, end)
+
+    def finish(self) -> t.Iterable[BlockOfCode]:
+        if self._source is None:
+            return
+        if self._pieces:
+            self._pieces.append(self._source[self._start:self._end])
+            body = ''.join(self._pieces)
+        else:
+            body = self._source[self._start:self._end]
+        indent = self._body_indent
+        if indent is None:
+            indent = 999999  # a block of blank lines, see _LineGrouper
+        self._pieces = []
+        self._source = None
+        self._body_indent = None
+        yield BlockOfCode(indent=indent, body=body)
@@ -1,54 +1,214 @@
 from __future__ import annotations
+
+import io
+import mmap
+import sys
+import tokenize
 import typing as t
 
-from mamba_to_pytest.constants import MAMBA_IMPORT_PATTERN, WITH_START_PATTERN, CLASS_PATTERN, METHOD_START_PATTERN, \
-    LINE_PATTERN, WITH_PATTERN
+from mamba_to_pytest.constants import LINE_KIND_PATTERN, WITH_PATTERN
+from mamba_to_pytest.line_table import LineKind, LineTable
 from mamba_to_pytest.lines import WithLine, LineOfCode, CodelessLine, ClassHeading, MethodHeading
 
 
-def split_mamba(mamba_input: t.TextIO) -> t.Iterable[LineOfCode | CodelessLine]:
-    for line in mamba_input.readlines():
-        line = line.rstrip('\n')
-        is_blank_line = not line or line.isspace()
-        if is_blank_line:
-            yield CodelessLine(line=line + '\n')
-        elif line.startswith('def test_'):
-            raise Exception(f"Function needs to be renamed as pytest will think it's a test:\n{line}")
+MambaInput = t.Union[str, t.TextIO, bytes, bytearray, mmap.mmap]
+"""The source text, a stream of it, or source bytes to be decoded like Python would, e.g. a memory-mapped file"""
+
+
+def split_mamba(mamba_input: MambaInput) -> t.Iterable[LineOfCode | CodelessLine]:
+    """
+    Classify each line, lazily: the first line is yielded before the rest of the input is read
+
+    Unless the input is a stream, lines are spans of the whole source text rather than copies, see lines.py.
+    """
+    return _create_lines(iter_line_spans(mamba_input))
+
+
+def split_mamba_into_logical_lines(mamba_input: MambaInput) -> t.Iterable[LineOfCode | CodelessLine]:
+    """
+    Like split_mamba, but classify logical lines as Python's tokenizer sees them. Reads all input at once.
+
+    A statement continued over several lines, e.g. an assignment of a multiline string or a method heading with a
+    parameter per line, is a single line spanning all of them, with the indent of the first.
+    """
+    return _create_lines(_iter_logical_line_spans(_read_all(mamba_input)))
+
+
+def _create_lines(spans: t.Iterable[tuple[str, int, int]]) -> t.Iterable[LineOfCode | CodelessLine]:
+    for source, start, end in spans:
+        classified = classify_line(source, start, end)
+        if not classified:
+            continue
+        kind, indent, detail = classified
+        if kind == LineKind.CODELESS:
+            yield CodelessLine(source=source, start=start, end=end)
+        elif kind == LineKind.WITH:
+            variable, name, comment = detail
+            yield WithLine(
+                indent=indent, variable=variable, name=name, comment=comment, source=source, start=start, end=end
+            )
+        elif kind == LineKind.CLASS:
+            yield ClassHeading(indent=indent, source=source, start=start, end=end)
+        elif kind == LineKind.METHOD:
+            yield MethodHeading(indent=indent, name=detail, source=source, start=start, end=end)
         else:
-            indent, tail = _parse_line(line)
-
-            if MAMBA_IMPORT_PATTERN.match(tail):
-                continue
-
-            if tail.startswith('#'):
-                yield CodelessLine(line + '\n')
-            elif WITH_START_PATTERN.match(tail):
-                yield _parse_a_with_line(indent, tail, line)
-            elif CLASS_PATTERN.match(tail):
-                yield ClassHeading(indent=indent, line=line + '\n')
-            elif match := METHOD_START_PATTERN.match(tail):
-                name = match.group(1)
-                yield MethodHeading(indent=indent, name=name, line=line + '\n')
-            else:
-                yield LineOfCode(indent=indent, line=line + '\n')
-
-
-def _parse_line(line: str) -> tuple[int, str]:
-    match = LINE_PATTERN.match(line)
+            yield LineOfCode(indent=indent, source=source, start=start, end=end)
+
+
+def split_mamba_into_table(mamba_input: MambaInput) -> LineTable:
+    """
+    Like split_mamba, but into a LineTable. Reads all input at once.
+    """
+    text = _read_all(mamba_input)
+    table = LineTable(text)
+    for source, start, end in _iter_text_line_spans(text):
+        classified = classify_line(source, start, end)
+        if classified:
+            kind, indent, detail = classified
+            table.append(kind, indent, start, end, detail)
+    return table
+
+
+def classify_line(source: str, start: int, end: int) -> tuple[LineKind, int, t.Any] | None:
+    """
+    :return: kind, indent and detail as in a LineTable, or None if the line is to be dropped
+    """
+    match = LINE_KIND_PATTERN.match(source, start, end)
     assert match
-    leading_spaces, tail = match.groups()
-    assert not tail.startswith('\t')
-    indent = len(leading_spaces)
-    return indent, tail
-
-
-def _parse_a_with_line(indent: int, tail: str, line: str) -> WithLine:
-    match = WITH_PATTERN.match(tail)
-    assert match, f'Cannot convert this with-line automatically, please simplify it first:\n{line}'
-    return WithLine(
-        variable=match.group(1).replace('_', '.'),
-        name=match.group(2),
-        comment=match.group(3),
-        line=line + '\n',
-        indent=indent,
-    )
\ No newline at end of file
+    kind = match.lastgroup
+    if kind == 'indent':
+        return LineKind.CODE, match.end('indent') - start, None
+    elif kind == 'blank' or kind == 'comment':
+        return LineKind.CODELESS, 0, None
+    elif kind == 'with':
+        tail = match.end('indent')
+        return LineKind.WITH, tail - start, parse_a_with_line(source, start, tail, end)
+    elif kind == 'class':
+        return LineKind.CLASS, match.end('indent') - start, None
+    elif kind == 'method':
+        return LineKind.METHOD, match.end('indent') - start, match.group('method_name')
+    elif kind == 'mamba_import':
+        return None
+    elif kind == 'test_function':
+        raise Exception(f"Function needs to be renamed as pytest will think it's a test:\n{source[start:end - 1]}")
+    else:
+        raise AssertionError(f'Indented with a tab:\n{source[start:end - 1]}')
+
+
+def iter_line_spans(mamba_input: MambaInput) -> t.Iterator[tuple[str, int, int]]:
+    """
+    Yield (source, start, end) of each line, including its newline, which is added to the last line if missing
+    """
+    if isinstance(mamba_input, str):
+        yield from _iter_text_line_spans(mamba_input)
+    elif isinstance(mamba_input, (bytes, bytearray, mmap.mmap)):
+        yield from _iter_text_line_spans(_decode(mamba_input))
+    else:
+        for line in mamba_input:
+            if not line.endswith('\n'):
+                line += '\n'
+            yield line, 0, len(line)
+
+
+def _iter_text_line_spans(text: str) -> t.Iterator[tuple[str, int, int]]:
+    start = 0
+    while start < len(text):
+        end = text.find('\n', start) + 1
+        if not end:
+            line = text[start:] + '\n'
+            yield line, 0, len(line)
+            return
+        yield text, start, end
+        start = end
+
+
+def _read_all(mamba_input: MambaInput) -> str:
+    """
+    The whole text, ending with a newline unless empty
+    """
+    if isinstance(mamba_input, str):
+        text = mamba_input
+    elif isinstance(mamba_input, (bytes, bytearray, mmap.mmap)):
+        text = _decode(mamba_input)
+    else:
+        text = mamba_input.read()
+    if text and not text.endswith('\n'):
+        text += '\n'
+    return text
+
+
+def _iter_logical_line_spans(text: str) -> t.Iterator[tuple[str, int, int]]:
+    """
+    Like _iter_text_line_spans, but a logical line continued over several physical lines is a single span
+
+    Blank and comment lines between logical lines are spans of their own, as in the source.
+    """
+    physical_spans = _iter_text_line_spans(text)
+    row = 1
+    """Row of the next physical line"""
+
+    first_row: int | None = None
+    """Row of the first token of the current logical line"""
+
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(text).readline):
+            if token.type == tokenize.NEWLINE:
+                assert first_row is not None
+                last_row = token.start[0]
+                for _ in range(row, first_row):
+                    yield next(physical_spans)
+                _, start, end = next(physical_spans)
+                for _ in range(first_row, last_row):
+                    _, _, end = next(physical_spans)
+                yield text, start, end
+                row = last_row + 1
+                first_row = None
+            elif first_row is None and token.type not in _NON_LOGICAL_TOKENS:
+                first_row = token.start[0]
+    except (tokenize.TokenError, IndentationError) as exc:
+        # E.g. unbalanced brackets, which the scanners of physical lines don't mind
+        if isinstance(exc, IndentationError):
+            error_row = exc.lineno or row
+            message = exc.msg
+        else:
+            error_row = first_row or exc.args[1][0]
+            message = exc.args[0]
+        lines = text.splitlines()
+        line = lines[error_row - 1] if error_row <= len(lines) else ''
+        raise Exception(f'Cannot tokenize ({message}), convert with another scanner instead:\n{line}') from exc
+    yield from physical_spans
+
+
+_NON_LOGICAL_TOKENS = frozenset({
+    tokenize.NL, tokenize.COMMENT, tokenize.INDENT, tokenize.DEDENT, tokenize.ENDMARKER,
+})
+
+
+def _decode(source: bytes | bytearray | mmap.mmap) -> str:
+    """
+    Decode at once, honouring a PEP 263 coding cookie or BOM, and translate newlines like text mode would
+    """
+    position = 0
+
+    def readline() -> bytes:
+        nonlocal position
+        end = source.find(b'\n', position) + 1 or len(source)
+        line = source[position:end]
+        position = end
+        return line
+
+    encoding, _ = tokenize.detect_encoding(readline)
+    text = str(source, encoding)
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def parse_a_with_line(source: str, start: int, tail: int, end: int) -> tuple[str, str | None, str | None]:
+    """
+    :return: variable, name and comment
+    """
+    match = WITH_PATTERN.match(source, tail, end)
+    assert match, f'Cannot convert this with-line automatically, please simplify it first:\n{source[start:end - 1]}'
+    # Interned, as there are only a few distinct ones
+    return sys.intern(match.group(1).replace('_', '.')), match.group(2), match.group(3)
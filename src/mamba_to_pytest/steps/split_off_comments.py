@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-import dataclasses
 import typing as t
+from array import array
 
+from mamba_to_pytest.line_table import LineKind, LineTable
 from mamba_to_pytest.lines import LineOfCode, WithLine, CodelessLine
 
 
@@ -10,6 +11,50 @@ def split_off_comments(lines: t.Iterable[LineOfCode | CodelessLine]) -> t.Iterab
     for line in lines:
         if isinstance(line, WithLine) and line.comment:
             yield LineOfCode(indent=line.indent, line=' ' * line.indent + line.comment + '\n')
-            yield dataclasses.replace(line, comment=None)
+            yield line.replace(comment=None)
         else:
             yield line
+
+
+def split_off_comments_in_table(table: LineTable) -> LineTable:
+    """
+    Like split_off_comments, but on a LineTable, which is changed in place
+
+    The comment becomes a SPLIT_OFF_COMMENT row spanning just the comment, rather than a line of new text.
+    """
+    rows: list[int] = []
+    """With-lines with a comment, before each of which a row is inserted"""
+
+    comment_starts = array('q')
+    comment_ends = array('q')
+    for row in range(len(table)):
+        if table.kinds[row] == LineKind.WITH:
+            variable, name, comment = table.get_detail(row)
+            if comment:
+                rows.append(row)
+                table.details[table.detail_indexes[row]] = (variable, name, None)
+                # The comment runs up to the newline
+                end = table.ends[row]
+                comment_starts.append(end - 1 - len(comment))
+                comment_ends.append(end)
+    if not rows:
+        return table
+
+    _insert_rows(table.kinds, rows, [LineKind.SPLIT_OFF_COMMENT] * len(rows))
+    _insert_rows(table.indents, rows, [table.indents[row] for row in rows])
+    _insert_rows(table.starts, rows, comment_starts)
+    _insert_rows(table.ends, rows, comment_ends)
+    _insert_rows(table.detail_indexes, rows, [-1] * len(rows))
+    return table
+
+
+def _insert_rows(column: array, rows: list[int], values: t.Sequence[int]) -> None:
+    # In place, growing the column once and moving the rows after each insertion back by the number of insertions up
+    # to there, from the last one, rather than building a copy of the column
+    end = len(column)
+    column.extend(values)
+    for i in range(len(rows) - 1, -1, -1):
+        row = rows[i]
+        column[row + i + 1:end + i + 1] = column[row:end]
+        column[row + i] = values[i]
+        end = row
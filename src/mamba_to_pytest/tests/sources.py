@@ -0,0 +1,59 @@
+"""
+Mamba sources shared by several test modules
+"""
+
+from pathlib import Path
+
+
+MAMBA_SOURCE = (
+    'from mamba import description, it\n'
+    '\n'
+    "with description('thing') as self:\n"
+    "    with it('works'):\n"
+    '        assert self\n'
+)
+
+EXAMPLE_FILE = Path(__file__).parent.parent / 'tests_manual' / 'test_foo_spec.py'
+
+SCANNER_EDGE_CASES = (
+    (
+        'x = 1\n'
+        "with description('a') as self:  # trailing\n"
+        '\n'
+        '    # leading comment\n'
+        '        deeper = 1\n'
+        '    shallower = 2\n'
+        'from mamba import it\n'
+        '    class Foo:\n'
+        "        with it('in a class'):  # not split off\n"
+        '            pass\n'
+        '    def baz(self,\n'
+        '            x):\n'
+        '        pass\n'
+        "    with it('works'):  # after a block\n"
+        '  \n'
+        "    with it('again'):\n"
+        'z = 3'
+    ),
+    (
+        "with description('a') as self:  # trailing\n"
+        '    x = 1\n'
+        'from mamba import it\n'
+        '    y = 2\n'
+        '\n'
+        '    class Foo:\n'
+        '        def bar(self):\n'
+        '            pass\n'
+        '    def baz(self, x):\n'
+        '        with open(x):\n'
+        '            pass\n'
+        "    with it('works'):# no space\n"
+        '        # comment\n'
+        '\n'
+        '  \n'
+        'z = 3'
+    ),
+)
+"""Sources on which every scanner of the line-level stages must give the same blocks as the staged one"""
+
+SCANNER_SOURCES = (EXAMPLE_FILE.read_text(), *SCANNER_EDGE_CASES, '\n\n', '')
@@ -0,0 +1,63 @@
+import pytest
+
+from mamba_to_pytest.api import convert_mamba_source, convert_many, ConversionError
+from mamba_to_pytest.tests.sources import MAMBA_SOURCE
+
+
+_PYTEST_SOURCE = (
+    '\n'
+    'class TestThing:\n'
+    '    def test_works(self, mamba):\n'
+    '        assert mamba\n'
+)
+
+
+def test_convert_mamba_source():
+    assert convert_mamba_source(MAMBA_SOURCE) == _PYTEST_SOURCE
+
+
+def test_convert_mamba_source_error():
+    with pytest.raises(ConversionError) as exc_info:
+        convert_mamba_source("with it('nameless test without body'):\n")
+
+    assert exc_info.value.exception_type == 'Exception'
+    assert 'has multiple/no children' in exc_info.value.message
+
+
+@pytest.mark.parametrize('jobs', (1, 2))
+def test_convert_many(jobs):
+    sources = [('good', MAMBA_SOURCE), ('bad', 'def test_x():\n')]
+
+    results = {result.name: result for result in convert_many(sources, jobs=jobs)}
+
+    assert results['good'].output == _PYTEST_SOURCE
+    assert results['good'].succeeded
+    assert results['bad'].output is None
+    assert not results['bad'].succeeded
+    assert "pytest will think it's a test" in results['bad'].error.message
+
+
+_MULTILINE_METHOD_SOURCE = (
+    "with description('a') as self:\n"
+    '    def longer_method_name(self,\n'
+    '                           x):\n'
+    '        return x\n'
+    '\n'
+    "    with it('works'):\n"
+    '        assert self.longer_method_name(1)\n'
+)
+
+
+@pytest.mark.parametrize('jobs', (1, 2))
+def test_convert_many_with_scanner(jobs):
+    # Given a source which only the tokenize scanner converts
+    sources = [('multiline', _MULTILINE_METHOD_SOURCE)]
+
+    # When
+    (staged,) = convert_many(sources, jobs=jobs)
+    (tokenize,) = convert_many(sources, jobs=jobs, scanner='tokenize')
+
+    # Then
+    assert not staged.succeeded
+    assert tokenize.output == convert_mamba_source(_MULTILINE_METHOD_SOURCE, scanner='tokenize')
+    assert 'def longer_method_name(mamba,\n' in tokenize.output
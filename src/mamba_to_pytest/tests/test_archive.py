@@ -0,0 +1,104 @@
+import io
+import tarfile
+import zipfile
+
+from mamba_to_pytest.archive import convert_archives
+from mamba_to_pytest.tests.sources import MAMBA_SOURCE
+
+
+def _add_member(tar, name, text, mtime=0):
+    data = text.encode()
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = mtime
+    tar.addfile(info, io.BytesIO(data))
+
+
+def test_convert_tarball_to_zip(tmp_path, capsys):
+    # Given a tarball with an enabled, a disabled, a broken and an unrelated file
+    tarball = tmp_path / 'snapshot.tar.gz'
+    with tarfile.open(tarball, 'w:gz') as tar:
+        _add_member(tar, 'a/test_one_spec.py', MAMBA_SOURCE)
+        _add_member(tar, 'a/b/disabled_two_disabled.py', MAMBA_SOURCE)
+        _add_member(tar, 'a/test_broken_spec.py', "with it('nameless test without body'):\n")
+        _add_member(tar, 'a/helpers.py', 'x = 1\n')
+    out_archive = tmp_path / 'converted.zip'
+
+    # When converting it
+    convert_archives([tarball], out_archive, jobs=2)
+
+    # Then the converted files keep their directories
+    with zipfile.ZipFile(out_archive) as zip_file:
+        assert zip_file.namelist() == ['a/test_one.py', 'a/b/test_two.py']
+        assert zip_file.read('a/test_one.py').decode().startswith('\nclass TestThing:\n')
+    output = capsys.readouterr().out
+    assert f'{tarball}:a/test_broken_spec.py failed\n' in output
+    assert output.endswith(f'2/3 succeeded\nWrote 2 files to {out_archive}\n')
+
+
+def test_convert_zip_with_duplicate_and_excluded_members(tmp_path, capsys):
+    # Given a zip in which both the enabled and disabled version of a file exist
+    archive = tmp_path / 'snapshot.zip'
+    with zipfile.ZipFile(archive, 'w') as zip_file:
+        zip_file.writestr('test_one_spec.py', MAMBA_SOURCE)
+        zip_file.writestr('disabled_one_disabled.py', MAMBA_SOURCE)
+        zip_file.writestr('vendor/test_two_spec.py', MAMBA_SOURCE)
+    out_archive = tmp_path / 'converted.tar'
+
+    # When converting it
+    convert_archives([archive], out_archive, exclude=['vendor'])
+
+    # Then the second one fails instead of overwriting the first
+    with tarfile.open(out_archive) as tar:
+        assert tar.getnames() == ['test_one.py']
+    assert 'Output file already exists: test_one.py' in capsys.readouterr().out
+
+
+def test_convert_member_with_coding_cookie(tmp_path):
+    # Given a member which is not UTF-8, as declared by its coding cookie
+    archive = tmp_path / 'snapshot.zip'
+    with zipfile.ZipFile(archive, 'w') as zip_file:
+        mamba_source = '# -*- coding: latin-1 -*-\n' + MAMBA_SOURCE + "        'é'\n"
+        zip_file.writestr('test_one_spec.py', mamba_source.encode('latin-1'))
+    out_archive = tmp_path / 'converted.zip'
+
+    # When converting it
+    convert_archives([archive], out_archive)
+
+    # Then it is decoded like Python would
+    with zipfile.ZipFile(out_archive) as zip_file:
+        assert "        'é'\n" in zip_file.read('test_one.py').decode()
+
+
+def test_convert_with_scanner(tmp_path):
+    # Given a member with a multiline method heading, which only the tokenize scanner converts
+    archive = tmp_path / 'snapshot.zip'
+    with zipfile.ZipFile(archive, 'w') as zip_file:
+        mamba_source = MAMBA_SOURCE + '    def helper(self,\n               x):\n        pass\n'
+        zip_file.writestr('test_one_spec.py', mamba_source)
+    out_archive = tmp_path / 'converted.zip'
+
+    # When converting it with that scanner
+    convert_archives([archive], out_archive, scanner='tokenize')
+
+    # Then it is used
+    with zipfile.ZipFile(out_archive) as zip_file:
+        assert 'def helper(mamba,\n' in zip_file.read('test_one.py').decode()
+
+
+def test_convert_twice_to_same_archive(tmp_path):
+    # Given a tarball
+    tarball = tmp_path / 'snapshot.tar'
+    with tarfile.open(tarball, 'w') as tar:
+        _add_member(tar, 'test_one_spec.py', MAMBA_SOURCE, mtime=1_000_000_000)
+    out_archive = tmp_path / 'converted.tar.gz'
+
+    # When converting it twice
+    convert_archives([tarball], out_archive)
+    first_archive = out_archive.read_bytes()
+    convert_archives([tarball], out_archive)
+
+    # Then both archives are the same, with the time of the mamba file
+    assert out_archive.read_bytes() == first_archive
+    with tarfile.open(out_archive) as tar:
+        assert tar.getmember('test_one.py').mtime == 1_000_000_000
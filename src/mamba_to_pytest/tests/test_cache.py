@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from mamba_to_pytest import main, pipeline
+from mamba_to_pytest.cache import ConversionCache
+
+
+def test_get_put(tmp_path):
+    cache = ConversionCache(tmp_path)
+    key = cache.get_key(b'source')
+
+    assert cache.get(key) is None
+    cache.put(key, 'output')
+    assert cache.get(key) == 'output'
+    assert cache.get_key(b'other source') != key
+
+
+def test_evict_least_recently_used(tmp_path):
+    cache = ConversionCache(tmp_path, max_size=2)
+    for mtime, key in enumerate(('old', 'middle', 'new')):
+        cache.put(key, 'x')
+        os.utime(tmp_path / key, ns=(mtime, mtime))
+
+    cache.evict()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['middle', 'new']
+
+
+def test_convert_mamba_file_skips_conversion_on_hit(tmp_path, monkeypatch):
+    # Given a file which was converted before
+    cache = ConversionCache(tmp_path / 'cache')
+    mamba_file = tmp_path / 'disabled_a_disabled.py'
+    mamba_file.write_text('x = 1\n')
+    out_file = tmp_path / 'test_a.py'
+    main.convert_mamba_file(mamba_file, out_file, cache)
+    out_file.unlink()
+
+    # When converting it again
+    def fail(*args):
+        pytest.fail('Should not convert on a cache hit')
+    monkeypatch.setattr(pipeline, 'convert_mamba', fail)
+    main.convert_mamba_file(mamba_file, out_file, cache)
+
+    # Then the cached output is written
+    assert out_file.read_text() == 'x = 1\n'
+
+
+def test_convert_mamba_file_caches_per_scanner(tmp_path):
+    # Given a file whose output depends on the scanner, converted before with the default one
+    cache = ConversionCache(tmp_path / 'cache')
+    mamba_file = tmp_path / 'disabled_a_disabled.py'
+    mamba_file.write_text(
+        "with description('a') as self:\n"
+        "    with context('b'):\n"
+        "        with it('works'):\n"
+        "            x = (1,\n"
+        "                 2)\n"
+    )
+    out_file = tmp_path / 'test_a.py'
+    main.convert_mamba_file(mamba_file, out_file, cache)
+    staged_output = out_file.read_text()
+
+    # When converting it with the tokenize scanner
+    main.convert_mamba_file(mamba_file, out_file, cache, scanner='tokenize')
+
+    # Then it is converted rather than taken from the cache
+    assert out_file.read_text() == '''\
+class TestA:
+    def test_b_works(self):
+        x = (1,
+                 2)
+'''
+    assert out_file.read_text() != staged_output
@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from mamba_to_pytest.discover import iter_mamba_files
+
+
+def _touch(path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+    return path
+
+
+def test_find_enabled_and_disabled_files_in_one_pass(tmp_path):
+    enabled = _touch(tmp_path / 'test_a_spec.py')
+    default_name = _touch(tmp_path / 'test_spec.py')
+    disabled = _touch(tmp_path / 'sub' / 'disabled_b_disabled.py')
+    deeper = _touch(tmp_path / 'sub' / 'deeper' / 'test_c_spec.py')
+    _touch(tmp_path / 'test_a.py')
+    _touch(tmp_path / 'sub' / 'helpers.py')
+
+    files = list(iter_mamba_files([tmp_path]))
+
+    # Files before subdirectories, each sorted by name
+    assert files == [enabled, default_name, disabled, deeper]
+
+
+def test_exclude(tmp_path):
+    kept = _touch(tmp_path / 'test_a_spec.py')
+    _touch(tmp_path / 'test_b_spec.py')
+    _touch(tmp_path / 'build' / 'test_c_spec.py')
+
+    files = list(iter_mamba_files([tmp_path], exclude=['build', '*/test_b_*']))
+
+    assert files == [kept]
+
+
+def test_pass_files_through_as_is(tmp_path):
+    explicit = tmp_path / 'anything.py'
+
+    files = list(iter_mamba_files([explicit], exclude=['*']))
+
+    assert files == [explicit]
@@ -0,0 +1,40 @@
+import subprocess
+
+from mamba_to_pytest.git import iter_changed_mamba_files
+
+
+def _git(repo, *args):
+    subprocess.run(
+        ('git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args),
+        cwd=repo, check=True, capture_output=True,
+    )
+
+
+def test_iter_changed_mamba_files(tmp_path, monkeypatch):
+    # Given a repository with committed mamba files
+    _git(tmp_path, 'init')
+    for name in ('disabled_same_disabled.py', 'disabled_modified_disabled.py', 'test_deleted_spec.py'):
+        (tmp_path / name).write_text('x = 1\n')
+    _git(tmp_path, 'add', '.')
+    _git(tmp_path, 'commit', '-m', 'initial')
+
+    # When some are changed afterwards, partly committed and partly not
+    (tmp_path / 'disabled_modified_disabled.py').write_text('x = 2\n')
+    (tmp_path / 'test_deleted_spec.py').unlink()
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'sub' / 'test_committed_spec.py').write_text('x = 1\n')
+    (tmp_path / 'sub' / 'helpers.py').write_text('x = 1\n')
+    _git(tmp_path, 'add', 'sub')
+    _git(tmp_path, 'commit', '-m', 'second')
+    (tmp_path / 'sub' / 'test_untracked_spec.py').write_text('x = 1\n')
+    (tmp_path / 'vendor').mkdir()
+    (tmp_path / 'vendor' / 'test_excluded_spec.py').write_text('x = 1\n')
+
+    # Then only the added and modified ones are found
+    monkeypatch.chdir(tmp_path)
+    files = iter_changed_mamba_files([tmp_path], 'HEAD~', exclude=['vendor'])
+    assert [path.relative_to(tmp_path).as_posix() for path in files] == [
+        'disabled_modified_disabled.py',
+        'sub/test_committed_spec.py',
+        'sub/test_untracked_spec.py',
+    ]
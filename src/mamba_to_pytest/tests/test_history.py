@@ -0,0 +1,84 @@
+import subprocess
+
+from mamba_to_pytest.history import convert_revisions
+from mamba_to_pytest.tests.sources import MAMBA_SOURCE
+
+
+def _git(repo, *args):
+    process = subprocess.run(
+        ('git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args),
+        cwd=repo, check=True, capture_output=True, text=True,
+    )
+    return process.stdout.strip()
+
+
+def test_convert_revisions(tmp_path, monkeypatch, capsys):
+    # Given a repository with two commits, of which the second changes one of two files
+    repo = tmp_path / 'repo'
+    (repo / 'sub').mkdir(parents=True)
+    _git(repo, 'init')
+    (repo / 'sub' / 'test_a_spec.py').write_text(MAMBA_SOURCE)
+    (repo / 'disabled_b_disabled.py').write_text(MAMBA_SOURCE)
+    _git(repo, 'add', '.')
+    _git(repo, 'commit', '-m', 'first')
+    first = _git(repo, 'rev-parse', 'HEAD')
+    (repo / 'disabled_b_disabled.py').write_text(MAMBA_SOURCE.replace('works', 'still works'))
+    _git(repo, 'commit', '-am', 'second')
+    second = _git(repo, 'rev-parse', 'HEAD')
+
+    # When converting both revisions
+    monkeypatch.chdir(repo)
+    out_directory = tmp_path / 'out'
+    convert_revisions(['HEAD~', 'HEAD'], [repo], out_directory)
+
+    # Then each revision gets its own output, without touching the working tree
+    assert (out_directory / first / 'sub' / 'test_a.py').read_text() == (
+        out_directory / second / 'sub' / 'test_a.py'
+    ).read_text()
+    assert 'test_works' in (out_directory / first / 'test_b.py').read_text()
+    assert 'test_still_works' in (out_directory / second / 'test_b.py').read_text()
+    assert sorted(path.name for path in repo.iterdir()) == ['.git', 'disabled_b_disabled.py', 'sub']
+    assert capsys.readouterr().out.endswith('4/4 succeeded\n')
+
+
+def test_convert_revisions_of_the_same_commit(tmp_path, monkeypatch, capsys):
+    # Given a commit which is both HEAD and tagged, with an enabled and a disabled file of the same name
+    repo = tmp_path / 'repo'
+    repo.mkdir()
+    _git(repo, 'init')
+    (repo / 'test_a_spec.py').write_text(MAMBA_SOURCE)
+    (repo / 'disabled_a_disabled.py').write_text(MAMBA_SOURCE.replace('works', 'still works'))
+    _git(repo, 'add', '.')
+    _git(repo, 'commit', '-m', 'first')
+    _git(repo, 'tag', 't1')
+    commit = _git(repo, 'rev-parse', 'HEAD')
+
+    # When converting both revisions
+    monkeypatch.chdir(repo)
+    out_directory = tmp_path / 'out'
+    convert_revisions(['HEAD', 't1'], [repo], out_directory)
+
+    # Then the commit is converted once, and the second file of the same output file is reported as failed
+    assert 'test_still_works' in (out_directory / commit / 'test_a.py').read_text()
+    out = capsys.readouterr().out
+    assert f'HEAD:test_a_spec.py failed\n    Output file already exists: {out_directory / commit / "test_a.py"}' in out
+    assert out.endswith('1/2 succeeded\n')
+
+
+def test_convert_revision_with_coding_cookie(tmp_path, monkeypatch):
+    # Given a committed file which is not UTF-8, as declared by its coding cookie
+    repo = tmp_path / 'repo'
+    repo.mkdir()
+    _git(repo, 'init')
+    mamba_source = '# -*- coding: latin-1 -*-\n' + MAMBA_SOURCE + "        'é'\n"
+    (repo / 'test_a_spec.py').write_bytes(mamba_source.encode('latin-1'))
+    _git(repo, 'add', '.')
+    _git(repo, 'commit', '-m', 'first')
+    commit = _git(repo, 'rev-parse', 'HEAD')
+
+    # When converting it
+    monkeypatch.chdir(repo)
+    convert_revisions(['HEAD'], [repo], tmp_path / 'out')
+
+    # Then it is decoded like Python would
+    assert "        'é'\n" in (tmp_path / 'out' / commit / 'test_a.py').read_text()
@@ -0,0 +1,26 @@
+from mamba_to_pytest.line_table import LineKind
+from mamba_to_pytest.lines import LineOfCode
+from mamba_to_pytest.pipeline import scan_mamba
+from mamba_to_pytest.steps.split_mamba import split_mamba_into_table
+from mamba_to_pytest.steps.split_off_comments import split_off_comments_in_table
+from mamba_to_pytest.tests.sources import SCANNER_EDGE_CASES
+
+
+def test_table_matches_staged_on_bytes():
+    mamba_source = SCANNER_EDGE_CASES[1].replace('\n', '\r\n').encode()
+    assert list(scan_mamba(mamba_source, 'table')) == list(scan_mamba(mamba_source))
+
+
+def test_split_off_comment_spans_the_comment():
+    # Given
+    table = split_mamba_into_table("    with it('a'):  # hi\n")
+
+    # When
+    result = split_off_comments_in_table(table)
+
+    # Then the comment row is inserted in place
+    assert result is table
+    assert list(table.kinds) == [LineKind.SPLIT_OFF_COMMENT, LineKind.WITH]
+    assert table.get_text(0) == '    # hi\n'
+    assert table.get_line(0) == LineOfCode(indent=4, line='    # hi\n')
+    assert table.get_detail(1) == ('it', 'a', None)
@@ -0,0 +1,33 @@
+from mamba_to_pytest.lines import LineOfCode, WithLine, CodelessLine, join_lines
+
+
+_SOURCE = 'x = 1\n\ny = 2\n'
+
+
+def test_span_equals_text():
+    line = LineOfCode(indent=0, source=_SOURCE, start=7, end=13)
+    assert line == LineOfCode(indent=0, line='y = 2\n')
+    assert line.line == 'y = 2\n'
+    assert repr(line) == "LineOfCode(line='y = 2\\n', indent=0)"
+
+
+def test_replace_keeps_span():
+    source = "with it('a'):  # comment\n"
+    line = WithLine(indent=0, variable='it', name='a', comment='# comment', source=source, start=0, end=len(source))
+    assert line.replace(comment=None) == WithLine(indent=0, line=source, variable='it', name='a', comment=None)
+
+
+def test_join_consecutive_spans():
+    lines = [
+        LineOfCode(indent=0, source=_SOURCE, start=0, end=6),
+        CodelessLine(source=_SOURCE, start=6, end=7),
+        LineOfCode(indent=0, source=_SOURCE, start=7, end=13),
+    ]
+    assert join_lines(lines) == _SOURCE
+    assert join_lines([lines[0], lines[2]]) == 'x = 1\ny = 2\n'
+    assert join_lines([lines[0], CodelessLine('\n')]) == 'x = 1\n\n'
+
+
+def test_construct_positionally():
+    assert LineOfCode(4, '    x\n') == LineOfCode(indent=4, line='    x\n')
+    assert CodelessLine('\n').line == '\n'
@@ -0,0 +1,98 @@
+import pytest
+
+from mamba_to_pytest.main import convert_mamba_files, main
+from mamba_to_pytest.tests.sources import MAMBA_SOURCE
+
+
+def test_convert_mamba_files_prints_results_while_files_are_still_listed(tmp_path, capsys):
+    # Given a lazy listing of many files, like discovery of a huge tree
+    printed_while_listing = []
+
+    def list_files():
+        for i in range(40):
+            mamba_file = tmp_path / f'disabled_{i}_disabled.py'
+            mamba_file.write_text(MAMBA_SOURCE)
+            printed_while_listing.append(capsys.readouterr().out)
+            yield mamba_file
+
+    # When converting them with several jobs
+    convert_mamba_files(list_files(), raise_if_failed=True, jobs=2)
+
+    # Then the first results are printed before the listing is exhausted, and in order
+    printed = ''.join(printed_while_listing)
+    assert printed.startswith(f'Convert {tmp_path / "disabled_0_disabled.py"}\n')
+    assert capsys.readouterr().out.endswith('40/40 succeeded\n')
+
+
+def test_watch_rejects_enabled_files(tmp_path, capsys):
+    # Given an enabled file
+    mamba_file = tmp_path / 'test_a_spec.py'
+    mamba_file.write_text(MAMBA_SOURCE)
+
+    # When watching it
+    with pytest.raises(SystemExit):
+        main([str(mamba_file), '--watch'])
+
+    # Then it is rejected rather than renamed
+    assert f'--watch only converts disabled_*_disabled.py files: {mamba_file}' in capsys.readouterr().err
+    assert mamba_file.exists()
+
+
+def test_file_jobs_rejects_more_than_one_job(tmp_path, capsys):
+    # When spreading both files and their contexts across processes
+    with pytest.raises(SystemExit):
+        main([str(tmp_path), '--jobs', '2', '--file-jobs', '2'])
+
+    # Then it is rejected rather than starting a pool per job
+    assert '--jobs and --file-jobs cannot both be more than 1' in capsys.readouterr().err
+
+
+def test_archive_out_rejects_options_for_files(tmp_path, capsys):
+    # When combining --archive-out with options it would ignore
+    with pytest.raises(SystemExit):
+        main([str(tmp_path / 'a.zip'), '--archive-out', str(tmp_path / 'b.zip'), '--report', 'r.jsonl', '--profile'])
+
+    # Then it is rejected rather than writing no report and profile
+    assert '--archive-out cannot be combined with --profile, --report' in capsys.readouterr().err
+    assert not (tmp_path / 'b.zip').exists()
+
+
+def test_archive_out_rejects_unknown_suffix(tmp_path, capsys):
+    # When writing to an archive of a type which cannot be written
+    with pytest.raises(SystemExit):
+        main([str(tmp_path / 'a.zip'), '--archive-out', str(tmp_path / 'b.rar')])
+
+    # Then it is rejected before converting anything
+    assert '--archive-out must end with one of .zip, .tar, .tar.gz, .tgz, .tar.bz2, .tar.xz' in capsys.readouterr().err
+
+
+def test_revision_rejects_options_for_files(tmp_path, capsys):
+    # When combining --revision with options it would ignore
+    with pytest.raises(SystemExit):
+        main(['--revision', 'HEAD', '--revision-out', str(tmp_path), '--since', 'HEAD~1', '--shard', '1/2'])
+
+    # Then it is rejected rather than converting all files
+    assert '--revision cannot be combined with --since, --shard' in capsys.readouterr().err
+
+
+def test_serve_rejects_paths(tmp_path, capsys):
+    # When passing paths to the server rather than to the client
+    with pytest.raises(SystemExit):
+        main(['--serve', str(tmp_path)])
+
+    # Then it is rejected rather than ignoring them
+    assert '--serve takes no paths, mamba_to_pytest_client sends them' in capsys.readouterr().err
+
+
+def test_convert_directory_named_serve(tmp_path, monkeypatch, capsys):
+    # Given a directory named serve
+    (tmp_path / 'serve').mkdir()
+    (tmp_path / 'serve' / 'disabled_a_disabled.py').write_text(MAMBA_SOURCE)
+    monkeypatch.chdir(tmp_path)
+
+    # When converting it
+    main(['serve', '--no-cache', '--jobs', '1'])
+
+    # Then its files are converted rather than starting a server
+    assert (tmp_path / 'serve' / 'test_a.py').exists()
+    assert capsys.readouterr().out.endswith('1/1 succeeded\n')
@@ -0,0 +1,46 @@
+import pickle
+from functools import partial
+
+from mamba_to_pytest.constants import TestScope
+from mamba_to_pytest import nodes
+
+create_context = partial(nodes.TestContext, class_fixture=None, method_fixture=None)
+
+
+def _create_test_context():
+    body = nodes.BlockOfCode(indent=8, body='        pass\n')
+    setup = nodes.TestSetup(indent=4, body=body, scope=TestScope.METHOD)
+    return create_context(
+        name='TestFoo',
+        indent=0,
+        method_fixture=nodes.Fixture(setup=setup, teardown=None, methods=(), scope=TestScope.METHOD, indent=4),
+        other_children=(nodes.Test(indent=4, body=body, name='test_foo'),),
+    )
+
+
+def test_children_are_computed_once():
+    node = _create_test_context()
+    assert node.children == (node.method_fixture, *node.other_children)
+    assert node.children is node.children
+
+
+def test_nodes_are_slotted():
+    node = _create_test_context()
+    assert not hasattr(node, '__dict__')
+    assert not hasattr(node.other_children[0], '__dict__')
+
+
+def test_pickle_keeps_children():
+    node = _create_test_context()
+    unpickled = pickle.loads(pickle.dumps(node))
+    assert unpickled == node
+    assert unpickled.children == node.children
+
+
+def test_replace_indent_leaves_continuation_lines_alone():
+    block = nodes.BlockOfCode(
+        indent=8, body="        x = '''\n  text\n'''\n        y = 1\n", continuation_lines=frozenset({1, 2})
+    )
+    assert block.replace_indent(4) == nodes.BlockOfCode(
+        indent=4, body="    x = '''\n  text\n'''\n    y = 1\n", continuation_lines=frozenset({1, 2})
+    )
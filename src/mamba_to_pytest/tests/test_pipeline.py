@@ -0,0 +1,136 @@
+import io
+from functools import partial
+
+import pytest
+
+from mamba_to_pytest.pipeline import convert_mamba, convert_mamba_streaming, convert_mamba_parallel, scan_mamba
+from mamba_to_pytest.tests.sources import EXAMPLE_FILE, SCANNER_SOURCES
+
+_NO_FIXTURE_FIRST = (
+    'from mamba import description, it, before\n'
+    '\n'
+    "with description('first') as self:\n"
+    "    with it('works'):\n"
+    '        assert self\n'
+    '\n'
+    "with description('second') as self:\n"
+    '    with before.each:\n'
+    '        self.x = 1\n'
+    '\n'
+    "    with it('works'):\n"
+    '        assert self.x\n'
+    '\n'
+    "with description('third') as self:\n"
+    '    with before.all:\n'
+    '        print()\n'
+    '\n'
+    "    with it('works'):\n"
+    '        pass\n'
+)
+
+
+def _convert(convert, mamba_source):
+    pytest_output = io.StringIO()
+    convert(io.StringIO(mamba_source), pytest_output)
+    return pytest_output.getvalue()
+
+
+@pytest.mark.parametrize('mamba_source', [EXAMPLE_FILE.read_text(), _NO_FIXTURE_FIRST, 'x = 1\n'])
+def test_streaming_matches_whole_tree(mamba_source):
+    assert _convert(convert_mamba_streaming, mamba_source) == _convert(convert_mamba, mamba_source)
+
+
+def test_parallel_matches_whole_tree():
+    # Many top-level contexts with fixtures which are numbered across the whole file
+    mamba_source = _NO_FIXTURE_FIRST + ''.join(
+        _NO_FIXTURE_FIRST.split('\n', 2)[2].replace("('", f"('{i} ") for i in range(10)
+    )
+    parallel_output = _convert(partial(convert_mamba_parallel, jobs=2), mamba_source)
+
+    assert 'mamba_other11' in parallel_output
+    assert parallel_output == _convert(convert_mamba, mamba_source)
+
+
+def test_streaming_rejects_duplicate_top_level_names():
+    mamba_source = "with description('a') as self:\n    pass\nwith description('a') as self:\n    pass\n"
+    with pytest.raises(AssertionError, match='duplicate pytest name'):
+        _convert(convert_mamba_streaming, mamba_source)
+
+
+@pytest.mark.parametrize('scanner', ['table', 'fused', 'tokenize'])
+@pytest.mark.parametrize('convert', [convert_mamba, convert_mamba_streaming])
+def test_scanner_matches_staged(convert, scanner):
+    mamba_source = EXAMPLE_FILE.read_text()
+    assert _convert(partial(convert, scanner=scanner), mamba_source) == _convert(convert_mamba, mamba_source)
+
+
+# Not tokenize, which is meant to give other blocks on multiline statements
+@pytest.mark.parametrize('scanner', ['table', 'fused'])
+@pytest.mark.parametrize('mamba_source', SCANNER_SOURCES)
+def test_scan_matches_staged(mamba_source, scanner):
+    assert list(scan_mamba(mamba_source, scanner)) == list(scan_mamba(mamba_source))
+
+
+def test_tokenize_scanner_converts_multiline_statements():
+    # Given the examples of manual fixes in the readme, which the other scanners fail on
+    mamba_source = (
+        "with description('a') as self:\n"
+        '    def longer_method_name(self,\n'
+        '                           x):\n'
+        '        return x\n'
+        '\n'
+        "    with it('works'):\n"
+        "        indented_var = \'\'\'\n"
+        'dedented str\n'
+        "\'\'\'\n"
+        '        assert self.longer_method_name(indented_var)\n'
+    )
+
+    # When
+    pytest_output = _convert(partial(convert_mamba, scanner='tokenize'), mamba_source)
+
+    # Then
+    assert '        def longer_method_name(mamba,\n                           x):\n' in pytest_output
+    assert "        indented_var = \'\'\'\ndedented str\n\'\'\'\n" in pytest_output
+    with pytest.raises(Exception, match='has multiple/no children'):
+        _convert(convert_mamba, mamba_source)
+
+
+def test_tokenize_scanner_keeps_multiline_strings_when_reindenting():
+    # Given a multiline string in a test which is flattened into its parent and in a method moved into a fixture
+    mamba_source = (
+        "with description('a') as self:\n"
+        '    def text(self):\n'
+        "        return \'\'\'\n"
+        'method str\n'
+        "    more\'\'\'\n"
+        '\n'
+        "    with context('b'):\n"
+        "        with it('works'):\n"
+        "            x = \'\'\'\n"
+        'dedented str\n'
+        '    more\n'
+        "\'\'\'\n"
+    )
+
+    # When
+    pytest_output = _convert(partial(convert_mamba, scanner='tokenize'), mamba_source)
+
+    # Then only the first line of each string is reindented
+    assert "        x = \'\'\'\ndedented str\n    more\n\'\'\'\n" in pytest_output
+    assert "            return \'\'\'\nmethod str\n    more\'\'\'\n" in pytest_output
+
+
+def test_tokenize_scanner_reports_unbalanced_brackets():
+    # Given an unbalanced bracket, which the staged scanner converts as is
+    mamba_source = (
+        "with description('a'):\n"
+        '    x = (\n'
+        "    with it('works'):\n"
+        '        pass\n'
+    )
+    assert 'x = (\n' in _convert(convert_mamba, mamba_source)
+
+    # When / Then
+    with pytest.raises(Exception, match=r'Cannot tokenize \(EOF in multi-line statement\).*\n    x = \($'):
+        _convert(partial(convert_mamba, scanner='tokenize'), mamba_source)
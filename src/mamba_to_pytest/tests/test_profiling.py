@@ -0,0 +1,43 @@
+import marshal
+
+from mamba_to_pytest.api import convert_mamba_source
+from mamba_to_pytest.profiling import StageStats, SlowestProfiles
+
+
+def test_report_each_stage():
+    stats: list[StageStats] = []
+
+    convert_mamba_source("with description('thing'):\n    with it('works'):\n        pass\n", on_stage=stats.append)
+
+    assert [stat.stage for stat in stats] == [
+        'split_mamba',
+        'ignore_class_and_def_bodies',
+        'split_off_comments',
+        'group_plain_lines_into_blocks',
+        'group_lines_into_tree',
+        'flatten_singleton_test_contexts',
+        'combine_setup_teardown',
+        'add_methods_to_fixtures',
+        'validate_node',
+        'convert_self_methods',
+        'convert_self_vars',
+        'write_tree',
+    ]
+    split_stats = stats[0]
+    assert split_stats.input_count is None
+    assert split_stats.output_count == 3
+    assert stats[1].input_count == 3
+    # Root, context, test and its body
+    assert stats[4].output_count == 4
+    assert all(stat.seconds >= 0 and stat.peak_memory >= 0 for stat in stats)
+
+
+def test_dump_slowest_profiles(tmp_path):
+    profiles = SlowestProfiles(tmp_path, count=2)
+    for seconds in (2, 1, 3):
+        profiles.add(f'dir/file{seconds}.py', seconds, {'seconds': seconds})
+
+    paths = profiles.dump()
+
+    assert [path.name for path in paths] == ['001_file3.py.prof', '002_file2.py.prof']
+    assert marshal.loads(paths[0].read_bytes()) == {'seconds': 3}
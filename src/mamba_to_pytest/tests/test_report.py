@@ -0,0 +1,35 @@
+import io
+import json
+from pathlib import Path
+
+from mamba_to_pytest.report import RunReport, FileStats, count_lines
+
+
+def test_report():
+    out = io.StringIO()
+    report = RunReport(out)
+    stats = FileStats(input_lines=10, input_bytes=100, output_lines=12, output_bytes=120)
+
+    report.add_file(Path('a.py'), error=None, stats=stats, seconds=1.0)
+    report.add_file(Path('b.py'), error='oops', stats=None, seconds=0.5)
+    report.add_summary(wall_seconds=2.0)
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert records == [
+        {
+            'type': 'file', 'path': 'a.py', 'status': 'succeeded', 'error': None, 'input_lines': 10,
+            'input_bytes': 100, 'output_lines': 12, 'output_bytes': 120, 'seconds': 1.0,
+        },
+        {'type': 'file', 'path': 'b.py', 'status': 'failed', 'error': 'oops', 'seconds': 0.5},
+        {
+            'type': 'summary', 'files': 2, 'succeeded': 1, 'failed': 1, 'input_lines': 10, 'input_bytes': 100,
+            'output_lines': 12, 'conversion_seconds': 1.5, 'wall_seconds': 2.0, 'files_per_second': 1.0,
+            'lines_per_second': 5.0,
+        },
+    ]
+
+
+def test_count_lines():
+    assert count_lines('') == 0
+    assert count_lines('a\nb\n') == 2
+    assert count_lines(b'a\nb') == 2
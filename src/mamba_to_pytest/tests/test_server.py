@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+from mamba_to_pytest.client import Client, main as client_main
+from mamba_to_pytest.server import ConversionServer
+
+
+@pytest.fixture
+def client(tmp_path):
+    socket_path = tmp_path / 'server.sock'
+    with ConversionServer(socket_path, cache=None) as server:
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            with Client(socket_path) as client:
+                yield client
+        finally:
+            server.shutdown()
+            thread.join()
+
+
+def test_convert_source(client):
+    assert client.convert_source('x = 1\n') == {'output': 'x = 1\n', 'error': None}
+    response = client.convert_source('def test_x():\n')
+    assert response['output'] is None
+    assert "pytest will think it's a test" in response['error']
+
+
+def test_convert_paths(client, tmp_path):
+    mamba_file = tmp_path / 'disabled_a_disabled.py'
+    mamba_file.write_text('x = 1\n')
+
+    response = client.convert_paths([tmp_path])
+
+    assert (tmp_path / 'test_a.py').read_text() == 'x = 1\n'
+    assert response['log'].endswith('1/1 succeeded\n')
+
+
+def test_invalid_request(client):
+    with pytest.raises(Exception, match='Expected either a source or paths'):
+        client._request({})
+
+
+def test_convert_source_with_scanner(tmp_path):
+    # Given a server with the tokenize scanner
+    socket_path = tmp_path / 'server.sock'
+    with ConversionServer(socket_path, cache=None, scanner='tokenize') as server:
+        # When converting a multiline method heading, which the default scanner fails on
+        source = (
+            "with description('a') as self:\n"
+            '    def f(self,\n'
+            '          x):\n'
+            '        pass\n'
+            "    with it('b'):\n"
+            '        pass\n'
+        )
+        response = server.handle_request_object({'source': source})
+
+    # Then it is used
+    assert response['error'] is None
+    assert 'def f(mamba,\n' in response['output']
+
+
+def test_client_without_server(tmp_path):
+    # When no server was started on the socket
+    with pytest.raises(SystemExit) as exc_info:
+        client_main(['--socket', str(tmp_path / 'server.sock'), str(tmp_path)])
+
+    # Then the client says so rather than failing with a traceback
+    assert str(exc_info.value.code).startswith(f'No server is listening on {tmp_path / "server.sock"}, start one')
@@ -0,0 +1,32 @@
+import argparse
+
+import pytest
+
+from mamba_to_pytest.shard import get_shard, parse_shard
+
+
+def test_parse_shard():
+    assert parse_shard('2/3') == (2, 3)
+    for value in ('0/3', '4/3', '2', 'a/b'):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_shard(value)
+
+
+def test_shards_are_balanced_and_cover_all_files(tmp_path):
+    # Given files of very different sizes
+    files = []
+    for i, size in enumerate((5000, 100, 2000, 2000, 300, 50, 1000, 10, 10, 3000)):
+        file = tmp_path / f'disabled_{i}_disabled.py'
+        file.write_text('x' * size)
+        files.append(file)
+
+    # When sharding them 3 ways
+    shards = [get_shard(files, index, 3) for index in (1, 2, 3)]
+
+    # Then each file is in exactly one shard, in the original order
+    assert sorted(file for shard in shards for file in shard) == sorted(files)
+    assert all(shard == [file for file in files if file in shard] for shard in shards)
+
+    # And the largest file gets a shard almost to itself
+    sizes = [sum(file.stat().st_size for file in shard) for shard in shards]
+    assert sizes == [5000, 4300, 4170]
@@ -1,4 +1,5 @@
 from __future__ import annotations
+import sys
 import typing as t
 from functools import partial
 
@@ -103,3 +104,24 @@ def test_convert_method_heading():
         name='foo',
         tail='original line\n'
     )
+
+
+def test_nest_deeper_than_the_recursion_limit():
+    # Given
+    depth = sys.getrecursionlimit() + 100
+    block = BlockOfCode(indent=depth, body='body\n')
+    blocks_and_lines = [
+        *(WithLine(indent=i, line='line\n', variable='context', name=f'name {i}', comment=None) for i in range(depth)),
+        block,
+    ]
+
+    # When
+    root = group_lines_into_tree(blocks_and_lines)
+
+    # Then
+    node: NodeBase = one(root.children)
+    for i in range(depth):
+        assert isinstance(node, TestContext)
+        assert node.indent == i
+        node = one(node.other_children)
+    assert node == block
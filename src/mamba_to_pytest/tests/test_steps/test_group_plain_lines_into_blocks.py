@@ -1,7 +1,8 @@
 import pytest
 
-from mamba_to_pytest.lines import WithLine, LineOfCode, MethodHeading
+from mamba_to_pytest.lines import WithLine, LineOfCode, MethodHeading, CodelessLine
 from mamba_to_pytest.nodes import BlockOfCode
+from mamba_to_pytest.steps import group_plain_lines_into_blocks as group_plain_lines_into_blocks_module
 from mamba_to_pytest.steps.group_plain_lines_into_blocks import group_plain_lines_into_blocks
 
 
@@ -45,3 +46,23 @@ class TestGroupPlainLines:
             separator_line,
             BlockOfCode(indent=0, body='line3\n'),
         ]
+
+
+def test_group_a_huge_block_joins_its_lines_once(monkeypatch):
+    # Given a block which starts with a long run of blank lines, see benchmarks/bench_group_blocks.py for its timing
+    lines = [CodelessLine('\n')] * 10_000 + [LineOfCode(indent=4, line='    x\n')] * 10_000
+    joined = []
+
+    def join_lines(body_lines):
+        joined.append(len(body_lines))
+        return original_join_lines(body_lines)
+
+    original_join_lines = group_plain_lines_into_blocks_module.join_lines
+    monkeypatch.setattr(group_plain_lines_into_blocks_module, 'join_lines', join_lines)
+
+    # When
+    (block,) = group_plain_lines_into_blocks(lines)
+
+    # Then
+    assert block.indent == 4
+    assert joined == [20_000]
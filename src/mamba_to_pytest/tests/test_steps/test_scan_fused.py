@@ -0,0 +1,19 @@
+import io
+
+from mamba_to_pytest.pipeline import scan_mamba
+from mamba_to_pytest.steps.scan_fused import scan_fused
+from mamba_to_pytest.tests.sources import SCANNER_EDGE_CASES
+
+
+def test_scan_fused_matches_staged_on_a_stream():
+    # Each line is a source of its own then
+    mamba_source = SCANNER_EDGE_CASES[0]
+    assert list(scan_fused(io.StringIO(mamba_source))) == list(scan_mamba(io.StringIO(mamba_source)))
+
+
+def test_scan_fused_is_lazy():
+    def iter_lines():
+        yield "with description('a') as self:\n"
+        raise AssertionError('Read too far')
+
+    assert next(iter(scan_fused(iter_lines()))).variable == 'description'
@@ -1,9 +1,10 @@
 import io
+import mmap
 import pytest
 from more_itertools import one
 
 from mamba_to_pytest.lines import LineOfCode, WithLine, CodelessLine, ClassHeading, MethodHeading
-from mamba_to_pytest.steps.split_mamba import split_mamba
+from mamba_to_pytest.steps.split_mamba import split_mamba, split_mamba_into_logical_lines
 
 
 @pytest.mark.parametrize(
@@ -92,3 +93,63 @@ def test_ignore_mamba_import(line: str, ignore: bool):
         assert not lines
     else:
         assert len(lines) == 1
+
+
+def test_decode_bytes_with_coding_cookie():
+    source = '# -*- coding: latin-1 -*-\r\nx = "é"\r\ny'.encode('latin-1')
+    lines = list(split_mamba(source))
+    assert lines == [
+        CodelessLine('# -*- coding: latin-1 -*-\n'),
+        LineOfCode(indent=0, line='x = "é"\n'),
+        LineOfCode(indent=0, line='y\n'),
+    ]
+
+
+def test_split_memory_mapped_file(tmp_path):
+    path = tmp_path / 'disabled_a_disabled.py'
+    path.write_bytes(b'\xef\xbb\xbfx = "\xc3\xa9"\n')
+    with path.open('rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as source:
+        assert list(split_mamba(source)) == [LineOfCode(indent=0, line='x = "é"\n')]
+
+
+def test_split_lazily():
+    # Given input which fails after the first line
+    def iter_lines():
+        yield 'x = 1\n'
+        raise AssertionError('Read too far')
+
+    # Then the first line is yielded before reading on
+    assert next(iter(split_mamba(iter_lines()))) == LineOfCode(indent=0, line='x = 1\n')
+
+
+def test_split_into_logical_lines():
+    # Given a multiline method heading and a dedented multiline string
+    source = (
+        '    def foo(self,\n'
+        '            x):  # comment\n'
+        '\n'
+        "        y = \'\'\'\n"
+        'dedented\n'
+        "\'\'\'\n"
+        '        # comment\n'
+        '        z = (1 +\n'
+        '# comment in between\n'
+        '             2)\n'
+    )
+
+    # When
+    lines = list(split_mamba_into_logical_lines(source))
+
+    # Then each statement is a single line with the indent of its first physical line
+    assert lines == [
+        MethodHeading(indent=4, name='foo', line='    def foo(self,\n            x):  # comment\n'),
+        CodelessLine('\n'),
+        LineOfCode(indent=8, line="        y = \'\'\'\ndedented\n\'\'\'\n"),
+        CodelessLine('        # comment\n'),
+        LineOfCode(indent=8, line='        z = (1 +\n# comment in between\n             2)\n'),
+    ]
+
+
+def test_split_into_logical_lines_matches_physical_lines():
+    source = "from mamba import it\nwith it('x'):  # comment\n    pass\n\nclass A:\n  x = 1"
+    assert list(split_mamba_into_logical_lines(source)) == list(split_mamba(source))
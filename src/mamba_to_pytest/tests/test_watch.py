@@ -0,0 +1,40 @@
+import os
+
+from mamba_to_pytest.watch import DisabledFileWatcher
+
+
+def test_poll_changed_disabled_files(tmp_path):
+    unchanged = tmp_path / 'disabled_a_disabled.py'
+    changed = tmp_path / 'sub' / 'disabled_b_disabled.py'
+    changed.parent.mkdir()
+    for path in (unchanged, changed, tmp_path / 'test_c_spec.py'):
+        path.write_text('x = 1\n')
+    watcher = DisabledFileWatcher([tmp_path])
+
+    # Only disabled files existing since the start are watched, nothing changed yet
+    assert watcher.file_count == 2
+    assert watcher.poll() == []
+
+    stat = changed.stat()
+    os.utime(changed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    added = tmp_path / 'disabled_d_disabled.py'
+    added.write_text('x = 1\n')
+    assert sorted(watcher.poll()) == sorted([changed, added])
+    assert watcher.poll() == []
+
+
+def test_ignore_enabled_files_passed_explicitly(tmp_path):
+    # Given an enabled and a disabled file, passed explicitly
+    enabled = tmp_path / 'test_a_spec.py'
+    disabled = tmp_path / 'disabled_b_disabled.py'
+    for path in (enabled, disabled):
+        path.write_text('x = 1\n')
+    watcher = DisabledFileWatcher([enabled, disabled])
+
+    # When the enabled one changes
+    stat = enabled.stat()
+    os.utime(enabled, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    # Then only the disabled one is watched, as converting the enabled one would rename it
+    assert watcher.file_count == 1
+    assert watcher.poll() == []
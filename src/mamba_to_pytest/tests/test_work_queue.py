@@ -0,0 +1,145 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import mamba_to_pytest
+
+from mamba_to_pytest.work_queue import convert_queued_mamba_files, _get_stale_claim, _take_over_claim
+from mamba_to_pytest.tests.sources import MAMBA_SOURCE
+
+
+def test_workers_share_files(tmp_path):
+    # Given files to convert
+    for i in range(20):
+        (tmp_path / f'disabled_{i}_disabled.py').write_text(MAMBA_SOURCE)
+    (tmp_path / 'disabled_broken_disabled.py').write_text("with it('nameless test without body'):\n")
+
+    # When two workers convert them through the same queue
+    command = [sys.executable, '-m', 'mamba_to_pytest.main', str(tmp_path), '--no-cache', '-j', '1']
+    command += ['--queue', str(tmp_path / 'queue')]
+    env = {**os.environ, 'PYTHONPATH': str(Path(mamba_to_pytest.__file__).parents[1])}
+    workers = [subprocess.Popen(command, stdout=subprocess.PIPE, text=True, env=env) for _ in range(2)]
+    outputs = [worker.communicate()[0] for worker in workers]
+
+    # Then each file was converted once and both print the output of all files
+    assert len(list((tmp_path / 'queue' / 'results').iterdir())) == 21
+    for output in outputs:
+        assert output.count('Convert ') == 21
+        assert output.endswith('20/21 succeeded\n')
+    assert outputs[0] == outputs[1]
+
+
+def test_skips_files_claimed_by_others(tmp_path, capsys):
+    # Given a file another worker already converted
+    mamba_file = tmp_path / 'disabled_a_disabled.py'
+    mamba_file.write_text(MAMBA_SOURCE)
+    queue = tmp_path / 'queue'
+    convert_queued_mamba_files([mamba_file], queue)
+    (tmp_path / 'test_a.py').write_text('# edited\n')
+    capsys.readouterr()
+
+    # When converting it through the same queue again
+    convert_queued_mamba_files([mamba_file], queue)
+
+    # Then it is not converted again, but its output is still printed
+    assert (tmp_path / 'test_a.py').read_text() == '# edited\n'
+    assert capsys.readouterr().out == f'Convert {mamba_file}\n     to {tmp_path / "test_a.py"}\n1/1 succeeded\n'
+
+
+def test_reconverts_files_whose_output_was_removed(tmp_path, capsys):
+    # Given a file converted by an earlier run, whose output file was removed since
+    mamba_file = tmp_path / 'disabled_a_disabled.py'
+    mamba_file.write_text(MAMBA_SOURCE)
+    queue = tmp_path / 'queue'
+    convert_queued_mamba_files([mamba_file], queue)
+    (tmp_path / 'test_a.py').unlink()
+    capsys.readouterr()
+
+    # When converting it through the same queue again
+    convert_queued_mamba_files([mamba_file], queue, poll_interval=0.01)
+
+    # Then the result of the earlier run is not trusted
+    assert (tmp_path / 'test_a.py').exists()
+    assert capsys.readouterr().out.endswith('1/1 succeeded\n')
+
+
+def test_reconverts_files_changed_since_an_earlier_run(tmp_path, capsys):
+    # Given a queue directory of an earlier run
+    mamba_file = tmp_path / 'disabled_a_disabled.py'
+    mamba_file.write_text("with it('nameless test without body'):\n")
+    queue = tmp_path / 'queue'
+    convert_queued_mamba_files([mamba_file], queue)
+    capsys.readouterr()
+
+    # When converting the file again after fixing it
+    mamba_file.write_text(MAMBA_SOURCE)
+    convert_queued_mamba_files([mamba_file], queue)
+
+    # Then the result of the earlier run is not reused
+    assert (tmp_path / 'test_a.py').exists()
+    assert capsys.readouterr().out.endswith('1/1 succeeded\n')
+
+
+def test_takes_over_claims_of_dead_workers(tmp_path, capsys):
+    # Given a file claimed by a worker on this host which died before writing its result, and one claimed by a worker
+    # on another host long ago
+    mamba_files = [tmp_path / 'disabled_a_disabled.py', tmp_path / 'disabled_b_disabled.py']
+    for mamba_file in mamba_files:
+        mamba_file.write_text(MAMBA_SOURCE)
+    queue = tmp_path / 'queue'
+    convert_queued_mamba_files(mamba_files, queue)
+    for result_file in (queue / 'results').iterdir():
+        result_file.unlink()
+    (tmp_path / 'test_a.py').unlink()
+    (tmp_path / 'test_b.py').unlink()
+    dead_worker = subprocess.Popen([sys.executable, '-c', ''])
+    dead_worker.wait()
+    claim_files = list((queue / 'claims').iterdir())
+    claim_files[0].write_text(f'{os.uname().nodename} {dead_worker.pid}\n')
+    claim_files[1].write_text('elsewhere 1\n')
+    os.utime(claim_files[1], (0, 0))
+    capsys.readouterr()
+
+    # When converting them through the same queue again
+    convert_queued_mamba_files(mamba_files, queue, poll_interval=0.01)
+
+    # Then this worker converts them instead of waiting forever
+    assert (tmp_path / 'test_a.py').exists()
+    assert (tmp_path / 'test_b.py').exists()
+    assert capsys.readouterr().out.endswith('2/2 succeeded\n')
+
+
+def test_fails_files_which_are_not_mamba_files(tmp_path, capsys):
+    # Given a file passed explicitly, which does not look like a mamba file
+    other_file = tmp_path / 'helpers.py'
+    other_file.write_text('x = 1\n')
+
+    # When converting it through a queue
+    convert_queued_mamba_files([other_file], tmp_path / 'queue')
+
+    # Then it fails like in a single run, instead of aborting the run
+    output = capsys.readouterr().out
+    assert f'{other_file} failed\n    Does not look like a mamba test file: helpers.py\n' in output
+    assert output.endswith('0/1 succeeded\n')
+
+
+def test_only_one_worker_takes_over_a_stale_claim(tmp_path):
+    # Given a file claimed by a worker on another host long ago
+    mamba_file = tmp_path / 'disabled_a_disabled.py'
+    mamba_file.write_text(MAMBA_SOURCE)
+    queue = tmp_path / 'queue'
+    convert_queued_mamba_files([mamba_file], queue)
+    for result_file in (queue / 'results').iterdir():
+        result_file.unlink()
+    (claim_file,) = (queue / 'claims').iterdir()
+    claim_file.write_text('elsewhere 1\n')
+    os.utime(claim_file, (0, 0))
+
+    # When two workers found it stale before either took it over
+    stale_claim = _get_stale_claim(claim_file, claim_timeout=60)
+    taken_over = [_take_over_claim(claim_file, stale_claim, claim_timeout=60) for _ in range(2)]
+
+    # Then only the first one takes it over
+    assert taken_over == [True, False]
+    assert claim_file.read_text() == f'{os.uname().nodename} {os.getpid()}\n'
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import os
+import time
+import typing as t
+from pathlib import Path
+
+from mamba_to_pytest.constants import DISABLED_TEST_PATTERN
+from mamba_to_pytest.discover import iter_mamba_file_entries
+
+
+class DisabledFileWatcher:
+    """
+    Polls for disabled mamba files which were added or modified since the previous poll
+
+    Only stats the disabled files themselves, on top of listing the directories.
+    """
+
+    def __init__(self, paths: t.Iterable[Path], exclude: t.Collection[str] = ()):
+        self._paths = tuple(paths)
+        self._exclude = exclude
+        self._signatures: dict[str, tuple[int, int]] = dict(self._scan())
+
+    @property
+    def file_count(self) -> int:
+        return len(self._signatures)
+
+    def poll(self) -> list[Path]:
+        signatures = dict(self._scan())
+        changed = [
+            Path(path) for path, signature in signatures.items() if self._signatures.get(path) != signature
+        ]
+        self._signatures = signatures
+        return changed
+
+    def _scan(self) -> t.Iterator[tuple[str, tuple[int, int]]]:
+        for path in self._paths:
+            if path.is_dir():
+                for entry in iter_mamba_file_entries(path, self._exclude):
+                    if DISABLED_TEST_PATTERN.fullmatch(entry.name):
+                        yield entry.path, _get_signature(entry.stat())
+            elif DISABLED_TEST_PATTERN.fullmatch(path.name):
+                # Like discovery, never watch enabled files, converting them would rename them
+                try:
+                    yield os.fspath(path), _get_signature(path.stat())
+                except FileNotFoundError:
+                    pass
+
+
+def _get_signature(stat: os.stat_result) -> tuple[int, int]:
+    return stat.st_mtime_ns, stat.st_size
+
+
+def watch(watcher: DisabledFileWatcher, convert: t.Callable[[list[Path]], None], interval: float) -> None:
+    """
+    Convert changed files every `interval` seconds, in this process so it stays warm, until interrupted
+    """
+    print(f'Watching {watcher.file_count} disabled files, press Ctrl+C to stop')
+    try:
+        while True:
+            time.sleep(interval)
+            changed = watcher.poll()
+            if changed:
+                convert(changed)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,237 @@
+"""
+Conversion of a set of files by several cooperating processes, possibly on different hosts sharing a filesystem
+
+There is no coordinator: every worker walks the same files and claims each by creating a lock file with O_EXCL, which
+is atomic on local filesystems and NFSv3+. A worker writes the result of each file it converted next to the claims,
+and once every file has a result, prints the merged output of all workers like a single run would.
+
+Results are keyed on the content of the file as well, so a queue directory reused by a later run only reuses the
+results of files which did not change since, and whose output file still exists.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import itertools
+import json
+import os
+import time
+import typing as t
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from functools import partial
+from pathlib import Path
+
+from mamba_to_pytest.constants import DISABLED_TEST_PATTERN, ENABLED_TEST_PATTERN
+from mamba_to_pytest.main import convert_mamba_file_logged, FileResult, ConvertOptions, get_base_name
+from mamba_to_pytest.report import FileStats, RunReport
+
+if t.TYPE_CHECKING:
+    from mamba_to_pytest.cache import ConversionCache
+
+
+def convert_queued_mamba_files(
+        files: t.Iterable[Path],
+        queue_directory: Path,
+        jobs: int = 1,
+        cache: ConversionCache | None = None,
+        report: RunReport | None = None,
+        quiet: bool = False,
+        streaming: bool = False,
+        file_jobs: int = 1,
+        scanner: str = 'staged',
+        poll_interval: float = 1.0,
+        claim_timeout: float = 3600.0,
+) -> None:
+    """
+    Convert the files not yet claimed by other workers, then wait for the others and print the output of all files
+
+    Each worker claims at most `jobs` files ahead, so files are spread over workers as they become free. A waiting
+    worker takes over the claim of a worker which died: one on the same host once its process is gone, one on another
+    host, whose process cannot be checked, once the claim is older than `claim_timeout` seconds. So is the claim of a
+    file whose output file was removed since an earlier run converted it.
+    """
+    start = time.perf_counter()
+    files = list(files)
+    claims = queue_directory / 'claims'
+    results = queue_directory / 'results'
+    claims.mkdir(parents=True, exist_ok=True)
+    results.mkdir(exist_ok=True)
+
+    keys = [_get_key(file) for file in files]
+    claimed = ((key, file) for key, file in zip(keys, files) if _claim(claims / key))
+    convert = partial(
+        convert_mamba_file_logged,
+        options=ConvertOptions(
+            raise_if_failed=False, cache=cache, profile=False, collect_cprofile_stats=False, streaming=streaming,
+            file_jobs=file_jobs, scanner=scanner,
+        ),
+    )
+    if jobs == 1:
+        for key, file in claimed:
+            _write_result(results / key, convert(file))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            pending: dict[Future[FileResult], str] = {}
+            for key, file in claimed:
+                pending[executor.submit(convert, file)] = key
+                if len(pending) >= jobs:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        _write_result(results / pending.pop(future), future.result())
+            for future in pending:
+                _write_result(results / pending[future], future.result())
+
+    total = 0
+    succeeded = 0
+    for key, file in zip(keys, files):
+        result = _wait_for_result(results / key, claims / key, poll_interval, claim_timeout)
+        if result is None:
+            _write_result(results / key, convert(_get_current_path(file)))
+            result = _read_result(results / key)
+        if not quiet or result['error'] is not None:
+            print(result['log'], end='')
+        if report:
+            stats = FileStats(**result['stats']) if result['stats'] else None
+            report.add_file(Path(result['mamba_file']), result['error'], stats, result['seconds'])
+        total += 1
+        if result['error'] is None:
+            succeeded += 1
+    print(f'{succeeded}/{total} succeeded')
+    if report:
+        report.add_summary(wall_seconds=time.perf_counter() - start)
+    if cache:
+        cache.evict()
+
+
+def _get_key(mamba_file: Path) -> str:
+    # By output file, so test_*_spec.py and the disabled_*_disabled.py it is renamed to are the same item to workers
+    # which listed the files before and after the rename, and by content, so results of earlier runs on other content
+    # are not reused
+    name = mamba_file.name
+    if name == 'test_spec.py' or ENABLED_TEST_PATTERN.fullmatch(name) or DISABLED_TEST_PATTERN.fullmatch(name):
+        path = mamba_file.absolute().with_name(f'test_{get_base_name(name)}.py')
+    else:
+        path = mamba_file.absolute()  # fails to convert, like in a single run
+    key = hashlib.sha256(os.fsencode(path))
+    key.update(b'\0')
+    try:
+        key.update(_get_current_path(mamba_file).read_bytes())
+    except OSError:
+        pass  # fails to convert as well
+    return key.hexdigest()
+
+
+def _get_current_path(mamba_file: Path) -> Path:
+    # Another worker may have converted and renamed the file since it was listed
+    match = ENABLED_TEST_PATTERN.fullmatch(mamba_file.name)
+    if match and not mamba_file.exists():
+        return mamba_file.with_name(f'disabled_{match.group(1)}_disabled.py')
+    return mamba_file
+
+
+def _claim(claim_file: Path) -> bool:
+    try:
+        fd = os.open(claim_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, 'w') as claim:
+        claim.write(f'{os.uname().nodename} {os.getpid()}\n')
+    return True
+
+
+def _write_result(result_file: Path, result: FileResult) -> None:
+    record = {
+        'mamba_file': str(result.mamba_file),
+        'log': result.log,
+        'error': result.error,
+        'stats': dataclasses.asdict(result.stats) if result.stats else None,
+        'seconds': result.seconds,
+    }
+    # Atomically, so waiting workers never read a partial result
+    tmp_file = result_file.with_name(f'{result_file.name}.{os.uname().nodename}.{os.getpid()}.tmp')
+    tmp_file.write_text(json.dumps(record))
+    os.replace(tmp_file, result_file)
+
+
+def _read_result(result_file: Path) -> dict[str, t.Any]:
+    return json.loads(result_file.read_text())
+
+
+def _wait_for_result(
+        result_file: Path, claim_file: Path, poll_interval: float, claim_timeout: float
+) -> dict[str, t.Any] | None:
+    """
+    The result of a file claimed by another worker, or None once that worker died and this one took over its claim
+    """
+    while True:
+        try:
+            result = _read_result(result_file)
+        except FileNotFoundError:
+            pass
+        else:
+            if result['error'] is not None or _get_out_file(Path(result['mamba_file'])).exists():
+                return result
+            # Else converted by an earlier run, whose claim is as stale as its result
+        stale_claim = _get_stale_claim(claim_file, claim_timeout)
+        if stale_claim is not None and _take_over_claim(claim_file, stale_claim, claim_timeout):
+            return None
+        time.sleep(poll_interval)
+
+
+def _get_out_file(mamba_file: Path) -> Path:
+    return mamba_file.with_name(f'test_{get_base_name(mamba_file.name)}.py')
+
+
+def _get_stale_claim(claim_file: Path, claim_timeout: float) -> str | None:
+    """
+    The owner and time of the claim if its worker died, which tell this claim apart from later claims of the file
+    """
+    try:
+        stat = claim_file.stat()
+        owner = claim_file.read_text()
+    except FileNotFoundError:
+        return None
+    host_and_pid = owner.split()
+    if host_and_pid == [os.uname().nodename, str(os.getpid())]:
+        # Claims of this process which still lack a result are of an earlier run, this run converted all of its own
+        # before waiting
+        is_stale = True
+    elif len(host_and_pid) == 2 and host_and_pid[0] == os.uname().nodename:
+        is_stale = not _is_running(int(host_and_pid[1]))
+    else:
+        is_stale = time.time() - stat.st_mtime > claim_timeout
+    return f'{owner.strip()} {stat.st_mtime_ns}' if is_stale else None
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # running as another user
+    return True
+
+
+def _take_over_claim(claim_file: Path, stale_claim: str, claim_timeout: float) -> bool:
+    """
+    Replace the stale claim by one of this worker, unless another worker which found it stale as well does so
+
+    Those workers race for a marker created with O_EXCL and named after the stale claim, which is never removed so it
+    cannot be won again for a later claim. Should the winner die before replacing the claim, the next marker is raced
+    for. The claim is replaced atomically, so it never goes missing for workers claiming files.
+    """
+    name = hashlib.sha256(stale_claim.encode()).hexdigest()
+    for attempt in itertools.count():
+        marker = claim_file.with_name(f'{claim_file.name}.{name}.{attempt}.takeover')
+        if _claim(marker):
+            break
+        if _get_stale_claim(marker, claim_timeout) is None:
+            return False
+    if _get_stale_claim(claim_file, claim_timeout) != stale_claim:
+        return False  # taken over by the winner of an earlier marker
+    tmp_file = claim_file.with_name(f'{claim_file.name}.{os.uname().nodename}.{os.getpid()}.tmp')
+    tmp_file.write_text(f'{os.uname().nodename} {os.getpid()}\n')
+    os.replace(tmp_file, claim_file)
+    return True